@@ -3,6 +3,8 @@ import random
 from datetime import datetime, timedelta
 import numpy as np
 
+from services.whale_repository import migrate
+
 # =========================================================
 # ⚙️ [설정]
 # =========================================================
@@ -68,6 +70,9 @@ def init_db_and_mock_data():
         current_date += timedelta(days=1)
     
     conn.commit()
+
+    # 3. 인덱스 / 롤업 테이블 마이그레이션 (가데이터 기준으로 롤업 생성)
+    migrate(conn)
     conn.close()
     print(f"✅ DB 세팅 완료! (생성된 가데이터: {mock_count}건)")
     print(f"📂 생성된 파일: {DB_PATH}")
@@ -1,19 +1,28 @@
 # backend/main.py
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-import yfinance as yf
 from datetime import datetime
-import pandas as pd
 import math
 import os
 from dotenv import load_dotenv
 from routers import report
+from services import async_runner, http_client, llm_gateway
+from services.market_snapshot import aget_snapshot
 
 
 # 1. 환경변수 로드
 load_dotenv()
 
-app = FastAPI()
+# 서버 종료 시 공용 HTTP / LLM 커넥션 풀, 블로킹 작업 풀 정리
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    http_client.close()
+    llm_gateway.close()
+    async_runner.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # 라우터 등록 
 app.include_router(report.router)
@@ -34,11 +43,12 @@ def clean_data(data):
 # ---------------------------------------------------------
 
 @app.get("/")
-def health_check():
+async def health_check():
     return {"status": "ok", "message": "Server running with Router pattern!"}
 
 @app.post("/StockMarket_Auto_Reporter")
-def get_StockMarket_Auto_Reporter():
+async def get_StockMarket_Auto_Reporter(watchlist: str = ""):
+    """watchlist: 추가로 조회할 티커 (콤마 구분, 예: AAPL,MSFT,NVDA)"""
     start_time = datetime.now()
     print(f"[{start_time}] 🚀 데이터 요청 도착! 처리 시작...")
 
@@ -47,50 +57,30 @@ def get_StockMarket_Auto_Reporter():
         'Nasdaq': '^IXIC',
         'Bitcoin': 'BTC-USD' 
     }
+    # 관심 종목은 티커 이름 그대로 표시 (종목 수가 늘어나도 한 번에 계산)
+    # 기본 지수와 같은 심볼(예: BTC-USD)은 중복 조회하지 않음
+    default_symbols = set(target_tickers.values())
+    for symbol in filter(None, (t.strip().upper() for t in watchlist.split(","))):
+        if symbol not in default_symbols:
+            target_tickers.setdefault(symbol, symbol)
     
-    symbols = list(target_tickers.values())
+    symbols = list(dict.fromkeys(target_tickers.values()))
     result = {}
 
     try:
-        # yf.download 실행
-        df = yf.download(symbols, period="2d", group_by='ticker', threads=True, progress=False, auto_adjust=False)
+        # yf.download(블로킹 전용 풀) + 전 종목 변동률 일괄 계산
+        snapshot = await aget_snapshot(symbols, period="2d")
 
         for name, symbol in target_tickers.items():
-            try:
-                # 1. 데이터 추출
-                if len(symbols) > 1:
-                    data = df[symbol]
-                else:
-                    data = df
-                
-                # 2. 유효성 검사 및 계산
-                if not data.empty:
-                    # 컬럼명 찾기 ('Close' 또는 'Adj Close')
-                    if 'Close' in data.columns:
-                        price_col = 'Close'
-                    elif 'Adj Close' in data.columns:
-                        price_col = 'Adj Close'
-                    else:
-                        price_col = data.columns[-1]
-
-                    last_close = float(data[price_col].iloc[-1])
-                    prev_close = float(data[price_col].iloc[-2]) if len(data) >= 2 else last_close
-                    
-                    # 변동률 계산
-                    if prev_close != 0:
-                        change_rate = ((last_close - prev_close) / prev_close) * 100
-                    else:
-                        change_rate = 0.0
-                    
-                    result[name] = {
-                        "price": round(last_close, 2),
-                        "change": f"{round(change_rate, 2)}%"
-                    }
-                else:
-                    result[name] = {"error": "No Data"}
-            except Exception as parse_error:
-                print(f"Error parsing {name}: {parse_error}")
-                result[name] = {"error": "Parse Error"}
+            snap = snapshot.loc[symbol]
+            if snap["valid_count"] == 0:
+                result[name] = {"error": "No Data"}
+                continue
+
+            result[name] = {
+                "price": round(float(snap["last_close"]), 2),
+                "change": f"{round(float(snap['change_pct']), 2)}%"
+            }
 
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
@@ -1,69 +1,134 @@
-from fastapi import APIRouter, Response
-from services.briefing_market_index import get_market_summary_markdown, get_sp500_map_image 
+import base64
+import json
+
+from fastapi import APIRouter, Query, Response
+from fastapi.responses import StreamingResponse
+from services.briefing_market_index import get_market_summary_markdown, get_market_summary_rows, has_market_data
 from services.economy_indicators import get_economy_indicators
 from services.market_news_crawl_llm import get_market_news
-from services.email_builder import generate_email_report
-from services.sentiment_analysis import get_sentiment_analysis
-from services.stock_news import get_interested_stock_news
+from services.email_builder import generate_email_report, is_complete_report, stream_email_report
+from services.sentiment_analysis import get_sentiment_analysis, iter_sentiment_analysis
+from services.stock_news import ANALYSIS_MODES, get_interested_stock_news
 from services.whale_tracker import run_whale_tracker
+from services import async_runner, llm_cache, llm_gateway, response_cache, sp500_map
 
 router = APIRouter(
     prefix="/report",  # 이 라우터의 모든 주소 앞에 /report가 붙음
     tags=["Report"]
 )
 
+# ---------------------------------------------------------
+# 엔드포인트별 응답 캐시 정책 (초)
+# ttl: 캐시 그대로 사용 / stale: ttl 이후 이전 값 응답 + 백그라운드 갱신
+# n8n 재시도나 여러 워크플로우의 동시 호출은 한 번만 계산됨
+# 모든 엔드포인트에서 ?no_cache=true 로 캐시 무시 가능
+# ---------------------------------------------------------
+CACHE_POLICY = {
+    "market-indicators":  {"ttl": 5 * 60,       "stale_ttl": 10 * 60},
+    "economy-indicators": {"ttl": 3 * 60 * 60,  "stale_ttl": 6 * 60 * 60},
+    "market-news":        {"ttl": 30 * 60,      "stale_ttl": 60 * 60},
+    "sentiment-analysis": {"ttl": 30 * 60,      "stale_ttl": 60 * 60},
+    "stock-news":         {"ttl": 30 * 60,      "stale_ttl": 60 * 60},
+    "whale-frequency":    {"ttl": 60 * 60,      "stale_ttl": 2 * 60 * 60},
+    "daily-briefing":     {"ttl": 15 * 60,      "stale_ttl": 30 * 60},
+}
+
+async def cached(name, compute, headers, no_cache, cacheable=None, key=None):
+    """
+    캐시 정책에 따라 계산 결과를 가져오고 X-Cache 헤더를 설정 (headers: response.headers 또는 dict)
+    compute(동기 서비스 함수)는 블로킹 전용 풀에서 실행 → 이벤트 루프/헬스체크를 막지 않음
+    key: 같은 정책을 쓰되 결과를 따로 캐시해야 할 때 (요청 옵션별 등), 기본값은 name
+    """
+    value, status, age = await response_cache.aget_or_compute(
+        key or name, compute, bypass=no_cache, cacheable=cacheable, **CACHE_POLICY[name]
+    )
+    headers["X-Cache"] = status
+    headers["X-Cache-Age"] = str(int(age))
+    return value
+
 # 1-1. 각종 지표 데일리 시황 마크다운 생성 엔드포인트
 @router.post("/market-indicators")
-def generate_market_indicators():
-    markdown_table = get_market_summary_markdown()
-    
+async def generate_market_indicators(response: Response, no_cache: bool = False):
+    # 행 데이터를 캐시하고 마크다운은 그 데이터로 생성 (이메일 HTML 표와 같은 데이터)
+    rows = await cached("market-indicators", get_market_summary_rows, response.headers, no_cache,
+                        cacheable=has_market_data)
+
     # n8n이 바로 쓸 수 있는 JSON 구조로 리턴
     return {
         "status": "success",
-        "market_summary_markdown": markdown_table
+        "market_summary_markdown": get_market_summary_markdown(rows),
+        "market_summary_rows": rows
     }
 
-router = APIRouter(
-    prefix="/report",
-    tags=["Report"]
-)
-
-# 1-2. S&P 500 Map 이미지(Base64) 생성 엔드포인트
+# 1-2. S&P 500 Map 이미지 엔드포인트
+# 캡처는 sp500_map 모듈이 CAPTURE_TTL 동안 캐시 (응답 캐시 대신)
 @router.post("/sp500-map")
-def fetch_sp500_map():
-    img_base64 = get_sp500_map_image()
-    
-    if img_base64:
-        return {
-            "status": "success",
-            "image_type": "base64",
-            "image_data": img_base64
-        }
-    else:
+async def fetch_sp500_map(variant: str = sp500_map.DEFAULT_VARIANT,
+                          fmt: str = Query(sp500_map.DEFAULT_FORMAT, alias="format"),
+                          raw: bool = False, inline: bool = False):
+    """
+    - 기본: 해시 URL과 이미지 정보(JSON)
+    - raw=true: 이미지 바이트 그대로 (Content-Type: image/jpeg | image/webp)
+    - inline=true: JSON에 base64(image_data)도 포함 (기존 n8n 워크플로우 호환)
+    variant: email(1200px) | full(1920px) / format: jpeg | webp
+    """
+    if variant not in sp500_map.VARIANTS or fmt not in sp500_map.FORMATS:
+        return Response(content="unknown variant/format", status_code=400)
+
+    image = await async_runner.run_blocking(sp500_map.get_variant, variant, fmt)
+    if image is None:
         return {
-            "status": "error", 
+            "status": "error",
             "message": "이미지 캡처 실패"
         }
-    
+
+    if raw:
+        return Response(content=image["data"], media_type=image["content_type"],
+                        headers={"ETag": f'"{image["digest"]}"'})
+
+    result = {
+        "status": "success",
+        "image_type": "url",
+        "image_url": sp500_map.image_path(image),
+        "content_type": image["content_type"],
+        "width": image["width"],
+        "height": image["height"],
+        "bytes": len(image["data"])
+    }
+    if inline:
+        result["image_data"] = base64.b64encode(image["data"]).decode("ascii")
+    return result
+
+# 1-2. 해시 URL 이미지 (내용이 바뀌면 URL도 바뀌므로 영구 캐시 가능)
+@router.get("/sp500-map/images/{filename}")
+async def get_sp500_map_file(filename: str):
+    found = await async_runner.run_blocking(sp500_map.read_variant_file, filename)
+    if found is None:
+        return Response(status_code=404)
+    data, content_type = found
+    return Response(content=data, media_type=content_type,
+                    headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
 # 1-3. FRED & Forex Factory 경제 지표 크롤링 엔드포인트
 @router.post("/economy-indicators")
-def fetch_economy_indicators():
+async def fetch_economy_indicators(response: Response, no_cache: bool = False):
     """
     1-3. FRED & Forex Factory 경제 지표 크롤링
     """
-    data = get_economy_indicators()
+    data = await cached("economy-indicators", get_economy_indicators, response.headers, no_cache, cacheable=bool)
     return {
         "status": "success",
-        "data": data 
+        "data": data
     }
 
 # 1-4. 전날 시장에 영향을 끼친 주요 뉴스들 요약 정리 (Upstage AI)
 @router.post("/market-news")
-def fetch_market_news():
+async def fetch_market_news(response: Response, no_cache: bool = False):
     """
     1-4. 지난 24시간 주요 미국 증시 뉴스 5선 (Upstage AI 요약)
     """
-    news_data = get_market_news()
+    news_data = await cached("market-news", get_market_news, response.headers, no_cache,
+                       cacheable=lambda v: isinstance(v, dict) and v.get("status") == "success")
     return {
         "status": "success",
         "data": news_data
@@ -71,23 +136,36 @@ def fetch_market_news():
 
 # 2-1. 관심 종목 커뮤니티 감성 분석 (공포/탐욕 지수) 엔드포인트
 @router.post("/sentiment-analysis")
-def fetch_sentiment_analysis():
+async def fetch_sentiment_analysis(response: Response, no_cache: bool = False):
     """
     2-1. 관심 종목 커뮤니티 감성 분석 (공포/탐욕 지수)
     """
-    data = get_sentiment_analysis()
+    data = await cached("sentiment-analysis", get_sentiment_analysis, response.headers, no_cache, cacheable=bool)
     return {
         "status": "success",
         "data": data
     }
 
+# 2-1. 감성 분석 스트리밍 (종목별 분석이 끝나는 순서대로 NDJSON 한 줄씩)
+@router.post("/sentiment-analysis/stream")
+async def stream_sentiment_analysis():
+    async def lines():
+        # 종목별 분석 제너레이터를 블로킹 전용 풀에서 한 단계씩 진행
+        async for item in async_runner.iterate_blocking(iter_sentiment_analysis()):
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 # 2-2. 관심 종목 뉴스 수집 엔드포인트
 @router.post("/stock-news")
-def fetch_stock_news():
+async def fetch_stock_news(response: Response, no_cache: bool = False, mode: str = None):
     """
     2-2. 관심 종목(Target Stocks) 관련 최신 뉴스 수집
+    mode: sequential(종목별 LLM 호출) | batched(헤드라인 묶음 호출), 생략 시 서버 기본값
     """
-    news_data = get_interested_stock_news()
+    if mode is not None and mode not in ANALYSIS_MODES:
+        return Response(content="unknown mode", status_code=400)
+    news_data = await cached("stock-news", lambda: get_interested_stock_news(mode), response.headers, no_cache,
+                             key=f"stock-news:{mode or 'default'}")
     return {
         "status": "success",
         "data": news_data
@@ -95,7 +173,7 @@ def fetch_stock_news():
 
 # 3-1. 고래 출몰 빈도 분석 엔드포인트
 @router.post("/whale-frequency")
-def report_whale_frequency():
+async def report_whale_frequency(response: Response, no_cache: bool = False):
     """
     3-1. 대규모 거래 체결 빈도수 파악
     [Whale Tracker]
@@ -103,21 +181,48 @@ def report_whale_frequency():
     2. Z-score > 2.0 검증
     3. DB 저장 및 빈도 분석 결과 반환
     """
-    data = run_whale_tracker()
-    
+    data = await cached("whale-frequency", run_whale_tracker, response.headers, no_cache)
+
     return {
         "status": "success",
         "count": len(data),
         "data": data
     }
 
+# LLM 응답 캐시 지표 (적중률, 절약된 LLM 대기시간)
+@router.get("/llm-cache-stats")
+async def report_llm_cache_stats():
+    return {
+        "status": "success",
+        "data": await async_runner.run_blocking(llm_cache.get_stats)
+    }
+
+# LLM 게이트웨이 지표 (모델별 호출 수, 지연시간/토큰 히스토그램)
+@router.get("/llm-gateway-stats")
+async def report_llm_gateway_stats():
+    return {
+        "status": "success",
+        "data": llm_gateway.get_stats()
+    }
+
 # 최종. 모든 데이터를 취합하여 완성된 HTML 이메일 본문 반환 엔드포인트
 @router.post("/daily-briefing")
-def get_daily_briefing_html():
+async def get_daily_briefing_html(no_cache: bool = False, stream: bool = False):
+    """
+    stream=true: 헤더와 빠른 섹션(지수/경제지표)을 먼저 보내고 느린 섹션은 끝나는 대로 이어서 전송
+    (응답 캐시를 거치지 않으며, 섹션 순서가 일반 모드와 다름)
+    """
+    if stream:
+        # 프록시(nginx 등) 버퍼링 없이 조각 단위로 전달되도록
+        return StreamingResponse(stream_email_report(), media_type="text/html; charset=utf-8",
+                                 headers={"X-Cache": response_cache.BYPASS, "X-Accel-Buffering": "no"})
     try:
-        html_content = generate_email_report()
-        return Response(content=html_content, media_type="text/html")
+        headers = {}
+        # 지연/실패 섹션이 있는 리포트는 저장하지 않음 (다음 요청에서 다시 생성)
+        html_content = await cached("daily-briefing", generate_email_report, headers, no_cache,
+                                    cacheable=is_complete_report)
+        return Response(content=html_content, media_type="text/html", headers=headers)
     except Exception as e:
         # 서버 에러 로그를 명확히 보기 위해 print 추가
         print(f"❌ Server Error: {e}")
-        return Response(content=f"<h1>Server Error</h1><p>{str(e)}</p>", status_code=500)
\ No newline at end of file
+        return Response(content=f"<h1>Server Error</h1><p>{str(e)}</p>", status_code=500)
@@ -0,0 +1,130 @@
+# backend/services/article_index.py
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# 수집한 기사 URL 기록 (URL 해시 → 최초 발견 시각, 처리 여부, 번역 결과)
+# - 이미 번역한 기사는 다음 실행에서 LLM에 다시 보내지 않음
+# - 기사 묶음이 이전과 완전히 같으면 시황 요약도 그대로 재사용
+DB_PATH = "article_index.db"
+EXPIRE_HOURS = 48     # 마지막으로 본 지 이 시간이 지난 기사/요약은 삭제
+
+_conn = None
+_lock = threading.Lock()
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=10)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS articles (
+                url_hash TEXT PRIMARY KEY,
+                url TEXT,
+                title TEXT,
+                first_seen REAL,
+                last_seen REAL,
+                processed INTEGER DEFAULT 0,
+                korean_title TEXT
+            )
+        ''')
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS set_summaries (
+                set_hash TEXT PRIMARY KEY,
+                summary TEXT,
+                created_at REAL,
+                last_seen REAL
+            )
+        ''')
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_last_seen ON articles (last_seen)")
+        _conn.commit()
+    return _conn
+
+
+def url_hash(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def set_hash(urls):
+    """기사 묶음 식별자 (순서 무관)"""
+    return hashlib.sha256("\n".join(sorted(url_hash(u) for u in urls)).encode("utf-8")).hexdigest()
+
+# =========================================================
+# 📖 조회
+# =========================================================
+def lookup(urls):
+    """
+    이미 알고 있는 기사 정보
+    반환: {url: {"first_seen", "processed", "korean_title"}} (처음 보는 URL은 포함 안 됨)
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    by_hash = {url_hash(u): u for u in urls}
+    placeholders = ",".join("?" * len(by_hash))
+    with _lock:
+        rows = _get_conn().execute(
+            f"SELECT url_hash, first_seen, processed, korean_title FROM articles WHERE url_hash IN ({placeholders})",
+            list(by_hash)
+        ).fetchall()
+    return {
+        by_hash[h]: {"first_seen": first_seen, "processed": bool(processed), "korean_title": korean_title}
+        for h, first_seen, processed, korean_title in rows
+    }
+
+
+def get_set_summary(urls):
+    """같은 기사 묶음으로 만든 요약이 있으면 반환 (없으면 None)"""
+    key = set_hash(urls)
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute("SELECT summary FROM set_summaries WHERE set_hash = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute("UPDATE set_summaries SET last_seen = ? WHERE set_hash = ?", (time.time(), key))
+    return row[0]
+
+# =========================================================
+# ✍️ 기록
+# =========================================================
+def record(articles, translations=None, summary=None):
+    """
+    이번 실행에서 내보낸 기사 기록
+    - articles: [{"link", "title"}, ...] → 처음 보면 추가, 이미 있으면 last_seen 갱신
+    - translations: {url: korean_title} → 처리 완료 표시
+    - summary: 이 기사 묶음 전체에 대한 시황 요약
+    """
+    now = time.time()
+    translations = translations or {}
+    with _lock:
+        conn = _get_conn()
+        with conn:
+            conn.executemany('''
+                INSERT INTO articles (url_hash, url, title, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url_hash) DO UPDATE SET last_seen = excluded.last_seen
+            ''', [(url_hash(a["link"]), a["link"], a["title"], now, now) for a in articles])
+            conn.executemany(
+                "UPDATE articles SET processed = 1, korean_title = ? WHERE url_hash = ?",
+                [(title, url_hash(url)) for url, title in translations.items()]
+            )
+            if summary is not None:
+                conn.execute('''
+                    INSERT OR REPLACE INTO set_summaries (set_hash, summary, created_at, last_seen)
+                    VALUES (?, ?, ?, ?)
+                ''', (set_hash([a["link"] for a in articles]), summary, now, now))
+            _purge(conn, now)
+
+
+def _purge(conn, now):
+    cutoff = now - EXPIRE_HOURS * 3600
+    conn.execute("DELETE FROM articles WHERE last_seen < ?", (cutoff,))
+    conn.execute("DELETE FROM set_summaries WHERE last_seen < ?", (cutoff,))
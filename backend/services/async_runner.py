@@ -0,0 +1,35 @@
+# backend/services/async_runner.py
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# async 라우트에서 블로킹 라이브러리(yfinance, feedparser, pandas, sqlite, openai 동기 클라이언트 등)를
+# 실행하는 전용 스레드 풀 → 이벤트 루프와 Starlette 기본 스레드풀(헬스체크 등)을 막지 않음
+BLOCKING_WORKERS = 16
+
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="blocking")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """블로킹 함수를 전용 풀에서 실행하고 결과를 기다림"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+async def iterate_blocking(iterator):
+    """블로킹 이터레이터(제너레이터)를 전용 풀에서 한 단계씩 진행하는 async 제너레이터"""
+    done = object()
+    while True:
+        item = await run_blocking(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+def shutdown():
+    """서버 종료 시 풀 정리"""
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -1,9 +1,7 @@
-import yfinance as yf
-import pandas as pd
-import requests
 from bs4 import BeautifulSoup
-import os
-import base64
+
+from services import http_client, renderer, sp500_map
+from services.market_snapshot import get_snapshot
 
 # 1. 감시할 티커 목록 (KRW=X 제거함)
 TICKERS = {
@@ -18,6 +16,9 @@ TICKERS = {
     "달러 인덱스 / 환율": "DX-Y.NYB"
 }
 
+# 지수 표 컬럼 (제목, 정렬)
+MARKET_TABLE_COLUMNS = [("지표", "left"), ("현재가", "center"), ("변동률", "center")]
+
 # 네이버 금융에서 원달러 환율 크롤링
 def get_naver_usd_rate():
     """
@@ -27,7 +28,7 @@ def get_naver_usd_rate():
         url = "https://finance.naver.com/marketindex/"
         # 봇 탐지 방지용 헤더
         headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url, headers=headers)
         
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, "html.parser")
@@ -41,12 +42,13 @@ def get_naver_usd_rate():
     
     return 0.0 # 실패 시 0.0 반환
 
-# 1-1. 마켓 요약 마크다운 생성
-def get_market_summary_markdown():
+# 1-1. 마켓 요약 표 데이터 (이메일 HTML / 마크다운 응답 공용)
+def get_market_summary_rows():
+    """[[지표, 현재가, 변동률], ...] (컬럼 순서는 MARKET_TABLE_COLUMNS)"""
     symbols = list(TICKERS.values())
     
-    # yfinance 데이터 다운로드
-    df = yf.download(symbols, period="5d", group_by='ticker', threads=True, progress=False, auto_adjust=False)
+    # yfinance 데이터 다운로드 + 전 종목 변동률 일괄 계산
+    snapshot = get_snapshot(symbols, period="5d")
 
     rows = []
     
@@ -54,48 +56,19 @@ def get_market_summary_markdown():
     krw_rate = get_naver_usd_rate()
     # 만약 크롤링 실패하면 0.0원이 뜸
 
-    # [2단계] 표 생성 루프
+    # [2단계] 표 생성 (계산은 끝났으므로 포맷팅만)
     for name, symbol in TICKERS.items():
         if symbol == "KRW=X":
             continue
         try:
-            if len(symbols) > 1:
-                try:
-                    data = df[symbol]
-                except KeyError:
-                    rows.append(f"| {name} | N/A | ⚠️ 티커 오류 |")
-                    continue
-            else:
-                data = df
-
-            # 컬럼명 찾기
-            cols = [c.lower() for c in data.columns]
-            target_col = None
-            if 'close' in cols:
-                target_col = data.columns[cols.index('close')]
-            elif 'adj close' in cols:
-                target_col = data.columns[cols.index('adj close')]
-            
-            if target_col is None:
-                rows.append(f"| {name} | N/A | ⚠️ 컬럼 없음 |")
-                continue
-
-            # 유효 데이터 필터링
-            valid_series = data[target_col].dropna()
+            snap = snapshot.loc[symbol]
 
-            if valid_series.empty:
-                rows.append(f"| {name} | N/A | ⚠️ 데이터 없음 |")
+            if snap["valid_count"] == 0:
+                rows.append([name, "N/A", "⚠️ 데이터 없음"])
                 continue
 
-            last_close = float(valid_series.iloc[-1])
-            
-            if len(valid_series) >= 2:
-                prev_close = float(valid_series.iloc[-2])
-            else:
-                prev_close = last_close
-
-            change_amt = last_close - prev_close
-            change_pct = (change_amt / prev_close) * 100 if prev_close != 0 else 0.0
+            last_close = float(snap["last_close"])
+            change_pct = float(snap["change_pct"])
 
             emoji = "🔴" if change_pct >= 0 else "🔵"
             sign = "+" if change_pct >= 0 else ""
@@ -111,37 +84,25 @@ def get_market_summary_markdown():
             else:
                 price_str = f"{last_close:,.2f}"
 
-            rows.append(f"| {name} | {price_str} | {emoji} {sign}{change_pct:.2f}% |")
+            rows.append([name, price_str, f"{emoji} {sign}{change_pct:.2f}%"])
 
         except Exception as e:
             print(f"Error processing {name}: {e}")
-            rows.append(f"| {name} | Error | ⚠️ {str(e)} |")
+            rows.append([name, "Error", f"⚠️ {str(e)}"])
 
-    header = "| 지표 | 현재가 | 변동률 |\n| :--- | :---: | :---: |"
-    return header + "\n" + "\n".join(rows)
+    return rows
 
-# 1-2. S&P 500 Map 이미지(Base64) 생성
-def get_sp500_map_image():
-    access_key = os.getenv("APIFLASH_ACCESS_KEY")
-    if not access_key: return None
-    
-    url = "https://api.apiflash.com/v1/urltoimage"
-    params = {
-        "access_key": access_key,
-        "url": "https://finviz.com/map.ashx?t=sec",
-        "element": "#canvas-wrapper",
-        "response_type": "image",
-        "format": "png",
-        "quality": 100,
-        "width": 1920,
-        "height": 1080,
-        "wait_until": "page_loaded"
-    }
+def has_market_data(rows):
+    """지수 하나라도 시세가 있으면 True (전부 N/A/Error면 다운로드 실패로 보고 캐시하지 않음)"""
+    return any(row[1] not in ("N/A", "Error") for row in rows or [])
 
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return base64.b64encode(response.content).decode("utf-8")
-    except Exception as e:
-        print(f"ApiFlash Error: {e}")
-        return None
\ No newline at end of file
+# 1-1. 마켓 요약 마크다운 생성
+def get_market_summary_markdown(rows=None):
+    if rows is None:
+        rows = get_market_summary_rows()
+    return renderer.render_markdown_table(MARKET_TABLE_COLUMNS, rows)
+
+# 1-2. S&P 500 Map 이미지 (이메일 <img src> 값)
+def get_sp500_map_image():
+    """캐시된 캡처의 이메일용 축소 이미지 (해시 URL 또는 data URI, 실패 시 None)"""
+    return sp500_map.get_email_image_src()
@@ -0,0 +1,110 @@
+# backend/services/briefing_pipeline.py
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# 섹션들은 서로 독립적인 네트워크 작업이므로 동시에 실행
+# (지수 / S&P 맵 / 경제지표 / 뉴스 = 4개 + 여유분)
+MAX_WORKERS = 8
+
+# 섹션 상태값
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+
+# with 문을 쓰면 종료 시 늦은 작업까지 기다리게 되므로 모듈 단위로 하나만 유지
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="briefing")
+
+
+def run_sections(sections):
+    """
+    독립적인 리포트 섹션들을 동시에 실행하고, 섹션별 마감 시간 안에 끝난 결과만 모아서 반환
+
+    sections: [{"name": "market_table", "func": callable, "deadline": 20, "fallback": 기본값}, ...]
+      - deadline: 파이프라인 시작 시점 기준 허용 시간(초)
+      - fallback: 지연/실패 시 대신 사용할 값
+
+    반환: {name: {"status": "ok"|"timeout"|"error", "value": ..., "elapsed": 초, "error": 메시지}}
+    """
+    started = time.monotonic()
+    futures = {}
+
+    for section in sections:
+        futures[section["name"]] = _executor.submit(_timed_call, section["func"])
+
+    results = {}
+    for section in sections:
+        name = section["name"]
+        fallback = section.get("fallback")
+        # 모든 섹션이 동시에 출발했으므로 '남은 시간'만큼만 기다림
+        remaining = max(0.0, started + section["deadline"] - time.monotonic())
+
+        try:
+            value, elapsed = futures[name].result(timeout=remaining)
+            results[name] = {"status": STATUS_OK, "value": value, "elapsed": elapsed, "error": None}
+        except FutureTimeoutError:
+            # 늦은 작업은 백그라운드에서 끝나도록 두고, 리포트는 기본값으로 진행
+            print(f"   ⏰ [{name}] 마감 시간({section['deadline']}초) 초과 → 기본값으로 대체")
+            results[name] = {
+                "status": STATUS_TIMEOUT, "value": fallback,
+                "elapsed": round(time.monotonic() - started, 2), "error": "deadline exceeded"
+            }
+        except Exception as e:
+            print(f"   ❌ [{name}] 실패 → 기본값으로 대체: {e}")
+            results[name] = {
+                "status": STATUS_ERROR, "value": fallback,
+                "elapsed": round(time.monotonic() - started, 2), "error": str(e)
+            }
+
+    total = round(time.monotonic() - started, 2)
+    timings = ", ".join(f"{n}={r['elapsed']}s({r['status']})" for n, r in results.items())
+    print(f"   ⏱️ 섹션 처리 완료 (총 {total}초): {timings}")
+    return results
+
+
+def run_sections_async(sections):
+    """
+    run_sections()의 async 버전 (스트리밍 응답용)
+    섹션별 Task를 바로 반환 → 호출자는 먼저 끝난 섹션부터 사용할 수 있음
+    반환: {name: asyncio.Task} (Task 결과는 run_sections()의 섹션 결과 dict와 동일)
+    """
+    started = time.monotonic()
+    return {section["name"]: asyncio.ensure_future(_await_section(section, started)) for section in sections}
+
+
+async def _await_section(section, started):
+    name = section["name"]
+    fallback = section.get("fallback")
+    future = asyncio.wrap_future(_executor.submit(_timed_call, section["func"]))
+    remaining = max(0.0, started + section["deadline"] - time.monotonic())
+
+    try:
+        value, elapsed = await asyncio.wait_for(future, timeout=remaining)
+        return {"status": STATUS_OK, "value": value, "elapsed": elapsed, "error": None}
+    except asyncio.TimeoutError:
+        print(f"   ⏰ [{name}] 마감 시간({section['deadline']}초) 초과 → 기본값으로 대체")
+        return {
+            "status": STATUS_TIMEOUT, "value": fallback,
+            "elapsed": round(time.monotonic() - started, 2), "error": "deadline exceeded"
+        }
+    except Exception as e:
+        print(f"   ❌ [{name}] 실패 → 기본값으로 대체: {e}")
+        return {
+            "status": STATUS_ERROR, "value": fallback,
+            "elapsed": round(time.monotonic() - started, 2), "error": str(e)
+        }
+
+
+def degraded_sections(results):
+    """지연되거나 실패한 섹션 이름 목록"""
+    return [name for name, r in results.items() if r["status"] != STATUS_OK]
+
+
+def _timed_call(func):
+    t0 = time.monotonic()
+    value = func()
+    return value, round(time.monotonic() - t0, 2)
@@ -0,0 +1,145 @@
+# backend/services/crawl_scheduler.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from services import http_client
+
+# =========================================================
+# ⚙️ [설정] 호스트별 요청 속도 제한 (초당 요청 수, 버스트 허용량)
+# =========================================================
+HOST_RATE_LIMITS = {
+    "finviz.com": (1.0, 2),
+    "reddit.com": (1.0, 2),
+    "finance.naver.com": (2.0, 2),
+}
+DEFAULT_RATE_LIMIT = (5.0, 5)
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+class TokenBucket:
+    """토큰 버킷 (rate: 초당 충전 토큰 수, capacity: 최대 버스트)"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """토큰이 있으면 1개 소비 후 0, 없으면 다음 토큰까지 기다려야 할 시간(초)"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """토큰이 생길 때까지 대기 후 1개 소비"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+def configure_host(host, rate, capacity=1):
+    """호스트 속도 제한 변경 (이미 만든 버킷도 교체)"""
+    with _buckets_lock:
+        HOST_RATE_LIMITS[host] = (rate, capacity)
+        _buckets.pop(host, None)
+
+
+def get_bucket(host):
+    with _buckets_lock:
+        if host not in _buckets:
+            # www.finviz.com → finviz.com 설정도 적용
+            key = next((h for h in HOST_RATE_LIMITS if host == h or host.endswith("." + h)), None)
+            rate, capacity = HOST_RATE_LIMITS.get(key, DEFAULT_RATE_LIMIT)
+            _buckets[host] = TokenBucket(rate, capacity)
+        return _buckets[host]
+
+
+def throttled_get(url, **kwargs):
+    """호스트 토큰 버킷을 통과한 뒤 공용 HTTP 클라이언트로 GET"""
+    get_bucket(urlsplit(url).netloc).acquire()
+    return http_client.get(url, **kwargs)
+
+# =========================================================
+# ⏱️ 단계별 소요시간 집계
+# =========================================================
+class StageTimer:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self.lock:
+            total, count = self.stages.get(stage, (0.0, 0))
+            self.stages[stage] = (total + seconds, count + 1)
+
+    def timed(self, stage, func, *args):
+        t0 = time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            self.record(stage, time.monotonic() - t0)
+
+    def summary(self):
+        wall = time.monotonic() - self.started
+        result = {"wall": round(wall, 2)}
+        for stage, (total, count) in self.stages.items():
+            result[stage] = {"total": round(total, 2), "count": count, "avg": round(total / count, 2) if count else 0.0}
+        return result
+
+    def report(self, title="Crawl"):
+        summary = self.summary()
+        parts = [f"{stage} {v['total']}초/{v['count']}건(평균 {v['avg']}초)"
+                 for stage, v in summary.items() if stage != "wall"]
+        print(f"   ⏱️ [{title}] 전체 {summary['wall']}초 | " + " | ".join(parts))
+        return summary
+
+# =========================================================
+# 🚀 파이프라인 실행
+# =========================================================
+def run_pipeline(jobs, fetch, parse, verify, max_workers=4, title="Crawl"):
+    """
+    fetch → parse 는 워커 스레드에서 동시에, verify 는 호출 스레드에서 순서대로 실행
+    (앞 페이지를 검증하는 동안 뒤 페이지 다운로드가 계속 진행됨)
+
+    - fetch(job) -> raw           : 네트워크 단계 (호스트 속도 제한은 fetch 안에서 throttled_get 사용)
+    - parse(job, raw) -> parsed   : 파싱 단계
+    - verify(job, parsed) -> None : 검증/저장 단계 (단일 스레드 → DB/중복체크 안전)
+
+    verify 순서는 jobs 순서와 동일 (결과가 실행마다 달라지지 않도록)
+    반환: 단계별 소요시간 요약
+    """
+    timer = StageTimer()
+
+    def fetch_and_parse(job):
+        raw = timer.timed("fetch", fetch, job)
+        return timer.timed("parse", parse, job, raw)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crawl") as pool:
+        futures = [(job, pool.submit(fetch_and_parse, job)) for job in jobs]
+        for job, future in futures:
+            try:
+                parsed = future.result()
+            except Exception as e:
+                print(f"   ⚠️ 크롤링 에러 ({job}): {e}")
+                continue
+            try:
+                timer.timed("verify", verify, job, parsed)
+            except Exception as e:
+                print(f"   ⚠️ 검증 에러 ({job}): {e}")
+
+    return timer.report(title)
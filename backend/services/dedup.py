@@ -0,0 +1,174 @@
+# backend/services/dedup.py
+
+import re
+import sqlite3
+import threading
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# 뉴스 제목 유사 중복 제거 (MinHash 서명 + LSH 밴드 인덱스)
+# - 제목 1건 검사 = 밴드 버킷 조회 몇 번 → 기존 제목 수와 무관하게 거의 상수 시간
+# - 이전 실행에서 내보낸 제목 서명을 DB에 저장 → 어제 보낸 기사는 오늘 다시 나오지 않음
+DB_PATH = "dedup_index.db"
+SHINGLE_SIZE = 3          # 문자 3-gram
+NUM_BANDS = 32
+ROWS_PER_BAND = 3
+NUM_PERM = NUM_BANDS * ROWS_PER_BAND
+SEED = 20240601           # 서명 재현용 (바꾸면 기존 저장 서명과 호환 안 됨)
+DEFAULT_THRESHOLD = 0.5   # 추정 Jaccard 유사도 이상이면 중복
+HISTORY_DAYS = 2          # 며칠 전까지 내보낸 제목을 중복으로 볼지 (오늘 기록은 제외 → 같은 날 재실행 시 결과 동일)
+KEEP_DAYS = 7             # DB 보관 기간
+
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(SEED)
+_PERM_A = _rng.integers(1, int(_PRIME), size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, int(_PRIME), size=NUM_PERM, dtype=np.uint64)
+SIGNATURE_VERSION = f"minhash-{NUM_PERM}-{SHINGLE_SIZE}-{SEED}"
+
+_conn = None
+_lock = threading.Lock()
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=10)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS seen_headlines (
+                namespace TEXT,
+                date TEXT,
+                title_key TEXT,
+                version TEXT,
+                signature BLOB,
+                title TEXT,
+                PRIMARY KEY (namespace, date, title_key)
+            ) WITHOUT ROWID
+        ''')
+        _conn.commit()
+    return _conn
+
+# =========================================================
+# ✍️ 서명 계산
+# =========================================================
+def normalize_title(title):
+    """소문자화, 구글 뉴스 ' - 매체명' 꼬리 제거, 기호/공백 정리"""
+    text = re.sub(r"\s+-\s+[^-]+$", "", title or "")
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def signature(title):
+    """MinHash 서명 (uint32 배열, 길이 NUM_PERM)"""
+    grams = shingles(normalize_title(title))
+    if not grams:
+        return np.full(NUM_PERM, int(_PRIME), dtype=np.uint32)
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    hashes %= _PRIME
+    # (a * x + b) mod p 를 모든 순열 × 모든 shingle 에 대해 한 번에 계산 후 최소값
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def similarity(sig_a, sig_b):
+    """서명 일치 비율 = Jaccard 유사도 추정치"""
+    return float(np.count_nonzero(sig_a == sig_b)) / NUM_PERM
+
+
+def _band_keys(sig):
+    return [(band, sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()) for band in range(NUM_BANDS)]
+
+# =========================================================
+# 🔍 중복 검사기
+# =========================================================
+class HeadlineDeduper:
+    """
+    namespace 단위 중복 검사기 (예: "stock:Tesla", "market")
+    - 생성 시 지난 HISTORY_DAYS 일 동안 내보낸 제목을 인덱스에 올림
+    - check_and_add(title): 중복이면 True, 아니면 이번 실행 목록에 추가하고 False
+    - commit(): 이번 실행에서 통과한 제목을 DB에 기록
+    """
+
+    def __init__(self, namespace, threshold=DEFAULT_THRESHOLD, history_days=HISTORY_DAYS, now=None):
+        self.namespace = namespace
+        self.threshold = threshold
+        self.today = (now or datetime.now()).strftime("%Y-%m-%d")
+        self.signatures = []
+        self.buckets = defaultdict(list)
+        self.pending = []
+        self.history_count = 0
+        if history_days > 0:
+            self._load_history(history_days, now or datetime.now())
+
+    def _load_history(self, history_days, now):
+        since = (now - timedelta(days=history_days)).strftime("%Y-%m-%d")
+        with _lock:
+            rows = _get_conn().execute('''
+                SELECT signature FROM seen_headlines
+                WHERE namespace = ? AND version = ? AND date >= ? AND date < ?
+            ''', (self.namespace, SIGNATURE_VERSION, since, self.today)).fetchall()
+        for (blob,) in rows:
+            self._index(np.frombuffer(blob, dtype=np.uint32))
+        self.history_count = len(rows)
+
+    def _index(self, sig):
+        idx = len(self.signatures)
+        self.signatures.append(sig)
+        for key in _band_keys(sig):
+            self.buckets[key].append(idx)
+
+    def find_duplicate(self, sig):
+        """threshold 이상 유사한 기존 서명의 유사도 (없으면 None)"""
+        candidates = set()
+        for key in _band_keys(sig):
+            candidates.update(self.buckets.get(key, ()))
+        best = None
+        for idx in candidates:
+            score = similarity(sig, self.signatures[idx])
+            if score >= self.threshold and (best is None or score > best):
+                best = score
+        return best
+
+    def is_duplicate(self, title):
+        return self.find_duplicate(signature(title)) is not None
+
+    def check_and_add(self, title):
+        sig = signature(title)
+        if self.find_duplicate(sig) is not None:
+            return True
+        self._index(sig)
+        self.pending.append((title, sig))
+        return False
+
+    def commit(self):
+        """통과한 제목을 오늘 날짜로 저장하고 KEEP_DAYS 지난 기록은 정리"""
+        if not self.pending:
+            return 0
+        rows = [
+            (self.namespace, self.today, normalize_title(title), SIGNATURE_VERSION, sig.tobytes(), title)
+            for title, sig in self.pending
+        ]
+        cutoff = (datetime.strptime(self.today, "%Y-%m-%d") - timedelta(days=KEEP_DAYS)).strftime("%Y-%m-%d")
+        with _lock:
+            conn = _get_conn()
+            with conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO seen_headlines (namespace, date, title_key, version, signature, title)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', rows)
+                conn.execute("DELETE FROM seen_headlines WHERE date < ?", (cutoff,))
+        self.pending = []
+        return len(rows)
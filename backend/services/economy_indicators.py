@@ -1,172 +1,296 @@
-import requests
+import io
 import os
+import json
+import re
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from dateutil.relativedelta import relativedelta
 from dotenv import load_dotenv
 
+from services import feed_fetcher, http_client, title_matcher
+
 load_dotenv()
 
 # 1. 지표 매핑 설정
+# freq: 발표 주기 (M: 월간, W: 주간, D: 일간) → 새 관측치가 나올 수 없는 기간에는 FRED 호출 생략
 INDICATOR_MAP = {
-    "CPIAUCSL": {"name": "소비자물가지수 (CPI)", "units": "pc1", "suffix": "%", "decimal": 1, "ff_title": "CPI y/y"},
-    "PPIFIS":   {"name": "생산자물가지수 (PPI)", "units": "pc1", "suffix": "%", "decimal": 1, "ff_title": "PPI m/m"},
-    "PCEPI":    {"name": "개인소비지출 (PCE)", "units": "pc1", "suffix": "%", "decimal": 1, "ff_title": "Core PCE Price Index m/m"},
-    "PAYEMS":   {"name": "비농업 고용지수 (NFP)", "units": "chg", "suffix": "K", "decimal": 0, "ff_title": "Non-Farm Employment Change"},
-    "ICSA":     {"name": "신규 실업수당 청구", "units": "lin", "suffix": "K", "divide": 1000, "decimal": 0, "ff_title": "Unemployment Claims"},
-    "RSAFS":    {"name": "소매 판매", "units": "pch", "suffix": "%", "decimal": 1, "ff_title": "Retail Sales m/m"},
-    "DFEDTARU": {"name": "기준금리 (FOMC)", "units": "lin", "suffix": "%", "decimal": 2, "ff_title": "Federal Funds Rate"}
+    "CPIAUCSL": {"name": "소비자물가지수 (CPI)", "units": "pc1", "suffix": "%", "decimal": 1, "ff_title": "CPI y/y", "freq": "M"},
+    "PPIFIS":   {"name": "생산자물가지수 (PPI)", "units": "pc1", "suffix": "%", "decimal": 1, "ff_title": "PPI m/m", "freq": "M"},
+    "PCEPI":    {"name": "개인소비지출 (PCE)", "units": "pc1", "suffix": "%", "decimal": 1, "ff_title": "Core PCE Price Index m/m", "freq": "M"},
+    "PAYEMS":   {"name": "비농업 고용지수 (NFP)", "units": "chg", "suffix": "K", "decimal": 0, "ff_title": "Non-Farm Employment Change", "freq": "M"},
+    "ICSA":     {"name": "신규 실업수당 청구", "units": "lin", "suffix": "K", "divide": 1000, "decimal": 0, "ff_title": "Unemployment Claims", "freq": "W"},
+    "RSAFS":    {"name": "소매 판매", "units": "pch", "suffix": "%", "decimal": 1, "ff_title": "Retail Sales m/m", "freq": "M"},
+    "DFEDTARU": {"name": "기준금리 (FOMC)", "units": "lin", "suffix": "%", "decimal": 2, "ff_title": "Federal Funds Rate", "freq": "D"}
 }
 
+# ff_title 오토마톤 (INDICATOR_MAP 기준으로 한 번만 생성)
+FF_MATCHER = title_matcher.TitleMatcher(info["ff_title"] for info in INDICATOR_MAP.values())
+
+# =========================================================
+# ⚙️ [설정] FRED 관측치 캐시
+# =========================================================
+FRED_URL = "https://api.stlouisfed.org/fred/series/observations"
+FRED_CACHE_FILE = "fred_cache.json"
+FRED_MAX_WORKERS = 4        # 동시 요청 수 (FRED 요청 제한 고려)
+FRED_RECHECK_HOURS = 6      # 새 관측치가 '나올 수 있는' 기간에 재확인하는 최소 간격
+
 def get_fred_data():
-    """FRED API에서 최신 데이터 가져오기"""
+    """FRED API에서 최신 데이터 가져오기 (캐시 + 병렬 요청)"""
     api_key = os.getenv("FRED_API_KEY")
     results = {}
-    
+    now = datetime.now()
+
+    cache = load_fred_cache()
+    stale = [sid for sid, info in INDICATOR_MAP.items()
+             if needs_refresh(cache.get(_cache_key(sid, info)), info.get("freq", "D"), now)]
+
+    # 갱신이 필요한 시리즈만 동시에 요청
+    if stale:
+        print(f"   📡 FRED 요청: {', '.join(stale)} (캐시 사용: {len(INDICATOR_MAP) - len(stale)}건)")
+        with ThreadPoolExecutor(max_workers=FRED_MAX_WORKERS) as pool:
+            fetched = dict(zip(stale, pool.map(lambda sid: _fetch_observation(sid, INDICATOR_MAP[sid], api_key), stale)))
+
+        for sid, obs in fetched.items():
+            key = _cache_key(sid, INDICATOR_MAP[sid])
+            if obs is not None:
+                cache[key] = {"date": obs["date"], "value": obs["value"], "checked_at": now.isoformat(timespec="seconds")}
+            elif key in cache:
+                # 요청 실패 시 이전 관측치 유지 (다음 호출에서 재시도)
+                cache[key]["checked_at"] = None
+        save_fred_cache(cache)
+
     for sid, info in INDICATOR_MAP.items():
+        obs = cache.get(_cache_key(sid, info))
+        if not obs:
+            continue
         try:
-            url = f"https://api.stlouisfed.org/fred/series/observations"
-            params = {
-                "series_id": sid,
-                "units": info.get("units"),
-                "sort_order": "desc",
-                "limit": 1,
-                "api_key": api_key,
-                "file_type": "json"
-            }
-            res = requests.get(url, params=params).json()
+            val = float(obs["value"])
             
-            if "observations" in res and res["observations"]:
-                obs = res["observations"][0]
-                val = float(obs["value"])
-                
-                if "divide" in info:
-                    val /= info["divide"]
-                
-                decimal_places = info.get("decimal", 2)
-                formatted_num = f"{val:,.{decimal_places}f}"
-                
-                date_str = obs["date"]
-                if sid == 'ICSA':
-                    ref_date = date_str[2:] # 25-12-13
-                else:
-                    ref_date = date_str[2:7] # 25-11
-                
-                results[info["ff_title"]] = {
-                    "name": info["name"],
-                    "value": val,
-                    "display_value": f"{formatted_num}{info['suffix']}",
-                    "ref_date": ref_date,
-                    "ff_title": info["ff_title"]
-                }
+            if "divide" in info:
+                val /= info["divide"]
+            
+            decimal_places = info.get("decimal", 2)
+            formatted_num = f"{val:,.{decimal_places}f}"
+            
+            date_str = obs["date"]
+            if sid == 'ICSA':
+                ref_date = date_str[2:] # 25-12-13
+            else:
+                ref_date = date_str[2:7] # 25-11
+            
+            results[info["ff_title"]] = {
+                "name": info["name"],
+                "value": val,
+                "display_value": f"{formatted_num}{info['suffix']}",
+                "ref_date": ref_date,
+                "ff_title": info["ff_title"]
+            }
         except Exception as e:
             print(f"FRED Error ({sid}): {e}")
             
     return results
 
+def _fetch_observation(sid, info, api_key):
+    """시리즈 하나의 최신 관측치 조회 (실패 시 None)"""
+    try:
+        params = {
+            "series_id": sid,
+            "units": info.get("units"),
+            "sort_order": "desc",
+            "limit": 1,
+            "api_key": api_key,
+            "file_type": "json"
+        }
+        res = http_client.get(FRED_URL, params=params).json()
+        if "observations" in res and res["observations"]:
+            return res["observations"][0]
+    except Exception as e:
+        print(f"FRED Error ({sid}): {e}")
+    return None
+
+# ---------------------------------------------------------
+# FRED 관측치 캐시 (series_id + units 단위)
+# ---------------------------------------------------------
+def _cache_key(sid, info):
+    return f"{sid}|{info.get('units')}"
+
+def load_fred_cache():
+    if not os.path.exists(FRED_CACHE_FILE):
+        return {}
+    try:
+        with open(FRED_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_fred_cache(cache):
+    """임시 파일에 쓴 뒤 교체 (쓰는 도중 읽어도 깨진 파일이 보이지 않음)"""
+    try:
+        tmp_path = f"{FRED_CACHE_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, FRED_CACHE_FILE)
+    except Exception as e:
+        print(f"⚠️ FRED Cache Save Error: {e}")
+
+def needs_refresh(entry, freq, now):
+    """
+    발표 주기를 기준으로 새 관측치가 존재할 수 있는지 판단
+    - M: 관측일(해당 월 1일) 기준 다음 달이 '끝나야' 다음 관측치 발표 가능
+    - W: 주간 관측일(토요일) + 7일 이후 목요일쯤 발표
+    - D: 다음 날부터 발표 가능
+    발표 가능 기간에 들어선 뒤에는 FRED_RECHECK_HOURS 간격으로만 재확인
+    """
+    if not entry or not entry.get("date"):
+        return True
+    try:
+        obs_date = datetime.strptime(entry["date"], "%Y-%m-%d")
+    except ValueError:
+        return True
+
+    if freq == "M":
+        earliest = obs_date + relativedelta(months=2)
+    elif freq == "W":
+        earliest = obs_date + timedelta(days=7 + 4)
+    else:
+        earliest = obs_date + timedelta(days=1)
+
+    if now < earliest:
+        return False
+
+    checked_at = entry.get("checked_at")
+    if checked_at:
+        try:
+            if now - datetime.fromisoformat(checked_at) < timedelta(hours=FRED_RECHECK_HOURS):
+                return False
+        except ValueError:
+            pass
+    return True
+
+# 캐시 무효화용 ?t= 파라미터 없이 고정 URL 사용 → ETag/Last-Modified 조건부 요청 가능
+FF_URL = "https://nfs.faireconomy.media/ff_calendar_thisweek.xml"
+
 def get_forex_factory_data():
     """Forex Factory XML 파싱 (공백 제거 기능 강화)"""
     try:
-        url = f"https://nfs.faireconomy.media/ff_calendar_thisweek.xml?t={int(datetime.now().timestamp())}"
-        
         # User-Agent 추가 (가끔 차단될 수 있음)
         headers = {'User-Agent': 'Mozilla/5.0'}
-        res = requests.get(url, headers=headers)
-        
-        # XML 파싱
-        try:
-            root = ET.fromstring(res.content)
-        except ET.ParseError:
-            print("XML Parse Error: Forex Factory 응답이 올바르지 않습니다.")
+        # 변경 없으면 304 → 이전 파싱 결과 재사용
+        items = feed_fetcher.fetch(FF_URL, parse=parse_forex_factory, headers=headers)
+        if items is None:
+            print("FF Error: Forex Factory 응답 오류")
             return []
-        
-        items = []
-        for event in root.findall("event"):
-            # 안전하게 텍스트 가져오기 함수 (None 방지 및 공백 제거)
-            def get_text(tag):
-                elem = event.find(tag)
-                if elem is not None and elem.text:
-                    return elem.text.strip() # [핵심] 앞뒤 공백 제거
-                return None
-
-            country = get_text("country")
-            if country != "USD": continue
-            
-            title = get_text("title")
-            forecast = get_text("forecast") # 예상치가 없는 경우도 있음
-            date_str = get_text("date")
-            time_str = get_text("time")
-            impact = get_text("impact")
-            
-            # title과 date만 있어도 리스트에는 추가해야 함 (forecast가 없어도 매칭은 시도)
-            if title and date_str and time_str:
-                
-                # 날짜/시간 파싱 (MM-DD-YYYY, 1:30pm)
-                try:
-                    mm, dd, yyyy = map(int, date_str.split('-'))
-                    
-                    time_str = time_str.lower()
-                    is_pm = "pm" in time_str
-                    is_am = "am" in time_str
-                    time_part = time_str.replace("am", "").replace("pm", "").strip()
-                    
-                    if ":" in time_part:
-                        hour, minute = map(int, time_part.split(':'))
-                    else:
-                        hour, minute = int(time_part), 0
-                        
-                    if is_pm and hour < 12: hour += 12
-                    if is_am and hour == 12: hour = 0
-                    
-                    # UTC 시간 생성 (뉴욕시간 가정 -> +9시간 KST 변환 보정)
-                    # 정확히는 XML 시간대에 따라 다르지만, 기존 JS 로직(+9h)을 따름
-                    dt_obj = datetime(yyyy, mm, dd, hour, minute)
-                    kst_time = dt_obj + timedelta(hours=9)
-                    
-                    kst_full_str = kst_time.strftime("%Y-%m-%d %H:%M")
-                    kst_date_str = kst_time.strftime("%Y-%m-%d")
-                    
-                    # Forecast 숫자 변환
-                    forecast_val = 0.0
-                    if forecast:
-                        clean_forecast = forecast.replace('%', '').replace('K', '').strip()
-                        try:
-                            forecast_val = float(clean_forecast)
-                        except:
-                            forecast_val = 0.0
-
-                    items.append({
-                        "title": title,
-                        "forecast_str": forecast if forecast else "-",
-                        "forecast_val": forecast_val,
-                        "impact": impact if impact else "-",
-                        "kst_full_str": kst_full_str,
-                        "kst_date_str": kst_date_str
-                    })
-                    
-                    # [디버깅] 매칭될 제목 확인용 (로그에 찍힘)
-                    # print(f"[XML Found] {title} / {date_str}")
-
-                except Exception as e:
-                    print(f"Date Parse Error ({title}): {e}")
-                    continue
-
         return items
-        
+
+    except ET.ParseError:
+        print("XML Parse Error: Forex Factory 응답이 올바르지 않습니다.")
+        return []
     except Exception as e:
         print(f"FF Error: {e}")
         return []
 
+# ---------------------------------------------------------
+# Forex Factory XML 스트리밍 파서
+# ---------------------------------------------------------
+FF_COUNTRY = "USD"
+FF_KST_OFFSET = timedelta(hours=9)   # 기존 JS 로직(+9h) 유지
+_FF_DATE_RE = re.compile(r"(\d{1,2})-(\d{1,2})-(\d{4})")                       # MM-DD-YYYY
+_FF_TIME_RE = re.compile(r"(\d{1,2})(?::(\d{2}))?\s*([ap]m)?", re.IGNORECASE)   # 1:30pm / 10am
+
+def _ff_datetime(date_str, time_str, date_cache):
+    """MM-DD-YYYY + 1:30pm → datetime (All Day/Tentative 등 시각 없는 일정은 ValueError)"""
+    day = date_cache.get(date_str)
+    if day is None:
+        m = _FF_DATE_RE.fullmatch(date_str)
+        if m is None:
+            raise ValueError(f"invalid date {date_str!r}")
+        mm, dd, yyyy = map(int, m.groups())
+        day = date_cache[date_str] = datetime(yyyy, mm, dd)
+
+    m = _FF_TIME_RE.fullmatch(time_str)
+    if m is None:
+        raise ValueError(f"invalid time {time_str!r}")
+    hour, minute, ampm = int(m.group(1)), int(m.group(2) or 0), (m.group(3) or "").lower()
+    if ampm == "pm" and hour < 12: hour += 12
+    if ampm == "am" and hour == 12: hour = 0
+    return day.replace(hour=hour, minute=minute)
+
+def _ff_forecast_value(forecast):
+    if not forecast:
+        return 0.0
+    try:
+        return float(forecast.replace('%', '').replace('K', '').strip())
+    except ValueError:
+        return 0.0
+
+def parse_forex_factory(content):
+    """
+    Forex Factory XML → USD 이벤트 목록 (파싱 실패 시 ET.ParseError)
+    iterparse로 <event> 하나씩 처리하고 바로 메모리에서 해제
+    """
+    items = []
+    date_cache = {}   # 한 주 일정의 날짜 문자열은 7개 남짓 → 한 번씩만 파싱
+    root = None
+    fields = {}
+
+    for event, elem in ET.iterparse(io.BytesIO(content), events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+
+        if elem.tag != "event":
+            # 하위 태그는 텍스트만 모아둠 (앞뒤 공백 제거, 빈 값은 None)
+            text = elem.text.strip() if elem.text else ""
+            fields[elem.tag] = text or None
+            continue
+
+        # </event>: USD가 아니면 날짜 파싱 없이 바로 버림
+        record, fields = fields, {}
+        root.clear()
+        if record.get("country") != FF_COUNTRY:
+            continue
+
+        title = record.get("title")
+        date_str = record.get("date")
+        time_str = record.get("time")
+        # title과 date만 있어도 리스트에는 추가해야 함 (forecast가 없어도 매칭은 시도)
+        if not (title and date_str and time_str):
+            continue
+
+        try:
+            kst_time = _ff_datetime(date_str, time_str.lower(), date_cache) + FF_KST_OFFSET
+        except ValueError as e:
+            print(f"Date Parse Error ({title}): {e}")
+            continue
+
+        forecast = record.get("forecast")
+        impact = record.get("impact")
+        items.append({
+            "title": title,
+            "forecast_str": forecast if forecast else "-",
+            "forecast_val": _ff_forecast_value(forecast),
+            "impact": impact if impact else "-",
+            "kst_full_str": kst_time.strftime("%Y-%m-%d %H:%M"),
+            "kst_date_str": kst_time.strftime("%Y-%m-%d")
+        })
+
+    return items
+
 def get_economy_indicators():
     """최종 데이터 병합 및 리턴"""
     fred_data = get_fred_data() # Dict
     ff_data = get_forex_factory_data() # List
+    # 캘린더를 한 번만 훑어서 모든 지표의 매칭 일정을 찾음
+    ff_matches = FF_MATCHER.match_all(ff_data)
     
     final_list = []
     
     for ff_title, f_item in fred_data.items():
         # [핵심] 부분 일치 매칭 (Partial Match)
         # 예: "Unemployment Claims" in "Unemployment Claims" -> True
-        matched_ff = next((x for x in ff_data if f_item['ff_title'].lower() in x['title'].lower()), None)
+        matched_ff = ff_matches.get(f_item['ff_title'])
         
         res_item = {
             "지표명": f_item["name"],
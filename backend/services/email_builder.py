@@ -1,38 +1,57 @@
 # backend/services/email_builder.py
 
-import os
-import markdown
 from datetime import datetime, timedelta
 import pytz # 시간대 처리를 위해 추가
-from jinja2 import Environment, FileSystemLoader
 
-from services.briefing_market_index import get_market_summary_markdown, get_sp500_map_image
+from services import renderer
+from services.briefing_market_index import MARKET_TABLE_COLUMNS, get_market_summary_rows, get_sp500_map_image
 from services.economy_indicators import get_economy_indicators
 from services.market_news_crawl_llm import get_market_news
+from services.briefing_pipeline import run_sections, run_sections_async, degraded_sections
 
-def generate_email_report():
-    print("💌 리포트 생성 시작...")
+# 섹션별 마감 시간(초) - 파이프라인 시작 시점 기준
+# 뉴스(LLM 요약)와 S&P 맵(일봉 동기화 + 렌더링)이 가장 느림
+SECTION_DEADLINES = {
+    "market_table": 20,
+    "sp500_map": 40,
+    "economy": 20,
+    "news": 60
+}
 
-    # [1-1] 지수 테이블
-    print("Creating Index Table...")
-    md_table = get_market_summary_markdown()
-    html_table = markdown.markdown(md_table, extensions=['tables'])
-
-    # [1-2] S&P 500 맵
-    print("Fetching Map Image...")
-    sp500_img = get_sp500_map_image()
-
-    # [1-3] 경제 지표 (전일 발표분만 필터링)
-    print("Fetching Economy Data...")
-    raw_economy_data = get_economy_indicators()
-    
-    # --- [수정] 날짜 필터링 로직 추가 ---
-    # 한국 시간 기준 '어제' 날짜 구하기
-    kst_tz = pytz.timezone('Asia/Seoul')
-    now_kst = datetime.now(kst_tz)
+# 지연/실패 안내 문구에 사용할 섹션 이름
+SECTION_LABELS = {
+    "market_table": "주요 지수",
+    "sp500_map": "S&P 500 히트맵",
+    "economy": "경제 지표",
+    "news": "주요 뉴스"
+}
+
+# 응답 캐시에 저장하면 안 되는 리포트 표시 (지연/실패 섹션 안내, 템플릿 오류 페이지)
+DEGRADED_MARKER = '<div class="degraded">'
+TEMPLATE_ERROR_MARKER = "<h1>Template Error</h1>"
+
+def build_sections():
+    """리포트 섹션 정의 (일반/스트리밍 모드 공용)"""
+    return [
+        {"name": "market_table", "func": get_market_summary_rows, "deadline": SECTION_DEADLINES["market_table"],
+         "fallback": [["-", "N/A", "⚠️ 데이터 지연"]]},
+        {"name": "sp500_map", "func": get_sp500_map_image, "deadline": SECTION_DEADLINES["sp500_map"], "fallback": None},
+        {"name": "economy", "func": get_economy_indicators, "deadline": SECTION_DEADLINES["economy"], "fallback": []},
+        {"name": "news", "func": get_market_news, "deadline": SECTION_DEADLINES["news"], "fallback": None},
+    ]
+
+# ---------------------------------------------------------
+# 섹션별 값 가공 (원본 결과 → 템플릿에 넘길 값)
+# ---------------------------------------------------------
+def prepare_market_table(rows):
+    """[1-1] 지수 표 행 데이터 → HTML (마크다운 변환 없이 바로 렌더링)"""
+    return renderer.render_table(MARKET_TABLE_COLUMNS, rows)
+
+def prepare_economy(raw_economy_data, now_kst):
+    """[1-3] 경제 지표 (한국 시간 기준 '어제' 발표분만 필터링)"""
     yesterday_kst = now_kst - timedelta(days=1)
     target_date_str = yesterday_kst.strftime("%Y-%m-%d")
-    
+
     print(f"Filtering Economy Data for: {target_date_str}")
 
     economy_data = []
@@ -41,40 +60,91 @@ def generate_email_report():
             # item['필터링(전일 발표)'] 값이 어제 날짜와 같은지 확인
             if item.get("필터링(전일 발표)") == target_date_str:
                 economy_data.append(item)
-    # ----------------------------------
+    return economy_data
 
-    # [1-4] 뉴스
-    print("Crawling News...")
-    news_result = get_market_news()
-    
+def prepare_news(news_result):
+    """[1-4] 뉴스 → {"market_summary", "news_list"}"""
     if isinstance(news_result, dict):
-        market_summary = news_result.get("market_summary", "요약 정보 없음")
-        news_list = news_result.get("news_list", [])
-    else:
-        market_summary = "뉴스 데이터를 가져오지 못했습니다."
-        news_list = []
-
-    # 2. Jinja2 템플릿 로드
-    template_dir = os.path.join(os.path.dirname(__file__), '../templates')
-    
+        return {
+            "market_summary": news_result.get("market_summary", "요약 정보 없음"),
+            "news_list": news_result.get("news_list", [])
+        }
+    return {"market_summary": "뉴스 데이터를 가져오지 못했습니다.", "news_list": []}
+
+SECTION_PREPARERS = {
+    "market_table": lambda value, now_kst: prepare_market_table(value),
+    "sp500_map": lambda value, now_kst: value,
+    "economy": prepare_economy,
+    "news": lambda value, now_kst: prepare_news(value),
+}
+
+def generate_email_report():
+    print("💌 리포트 생성 시작...")
+
+    # [1-1 ~ 1-4] 서로 독립적인 섹션들을 동시에 수집
+    # 전체 소요시간 = 가장 느린 섹션 (마감 시간을 넘긴 섹션은 기본값으로 대체)
+    sections = run_sections(build_sections())
+    degraded = [SECTION_LABELS[name] for name in degraded_sections(sections)]
+
+    kst_tz = pytz.timezone('Asia/Seoul')
+    now_kst = datetime.now(kst_tz)
+    prepared = {name: SECTION_PREPARERS[name](r["value"], now_kst) for name, r in sections.items()}
+    news = prepared["news"]
+
+    # 2. 렌더링 (공용 템플릿 환경: 컴파일된 템플릿 재사용)
+    today_str = now_kst.strftime("%Y년 %m월 %d일 (%a)") # KST 기준 날짜 표시
+
     try:
-        env = Environment(loader=FileSystemLoader(template_dir))
-        template = env.get_template('report_template.html')
+        rendered_html = renderer.render(
+            'report_template.html',
+            today_date=today_str,
+            market_summary=news["market_summary"],
+            market_table_html=prepared["market_table"],
+            sp500_image=prepared["sp500_map"],
+            news_list=news["news_list"],
+            economy_list=prepared["economy"], # 필터링된 데이터 전달
+            degraded_sections=degraded # 지연/실패 섹션 안내
+        )
     except Exception as e:
         print(f"❌ Template Loading Error: {e}")
-        return f"<h1>Template Error</h1><p>{str(e)}</p>"
+        return f"{TEMPLATE_ERROR_MARKER}<p>{str(e)}</p>"
 
-    # 3. 렌더링
-    today_str = now_kst.strftime("%Y년 %m월 %d일 (%a)") # KST 기준 날짜 표시
-    
-    rendered_html = template.render(
-        today_date=today_str,
-        market_summary=market_summary,
-        market_table_html=html_table,
-        sp500_image=sp500_img,
-        news_list=news_list,
-        economy_list=economy_data # 필터링된 데이터 전달
-    )
-    
     print("✅ 리포트 생성 완료!")
-    return rendered_html
\ No newline at end of file
+    return rendered_html
+
+def is_complete_report(html):
+    """모든 섹션이 정상으로 채워진 리포트인지 (기본값으로 대체된 섹션/템플릿 오류가 없으면 True)"""
+    return bool(html) and DEGRADED_MARKER not in html and TEMPLATE_ERROR_MARKER not in html
+
+async def stream_email_report():
+    """
+    스트리밍 모드: 헤더와 먼저 끝난 섹션부터 HTML 조각을 바로 내보내는 async 제너레이터
+    - 섹션 순서는 report_stream.html 기준 (지수 → 경제지표 → 히트맵 → 요약/뉴스)
+    - 첫 바이트까지 걸리는 시간 ≈ 지수 섹션 소요시간
+    """
+    print("💌 리포트 스트리밍 시작...")
+    kst_tz = pytz.timezone('Asia/Seoul')
+    now_kst = datetime.now(kst_tz)
+    tasks = run_sections_async(build_sections())
+
+    async def section(name):
+        result = await tasks[name]
+        return SECTION_PREPARERS[name](result["value"], now_kst)
+
+    async def degraded():
+        results = {name: await task for name, task in tasks.items()}
+        return [SECTION_LABELS[name] for name in degraded_sections(results)]
+
+    try:
+        async for chunk in renderer.generate_async(
+            'report_stream.html',
+            today_date=now_kst.strftime("%Y년 %m월 %d일 (%a)"),
+            section=section,
+            degraded_sections=degraded
+        ):
+            yield chunk
+    finally:
+        # 클라이언트가 중간에 끊어도 남은 섹션 Task가 경고 없이 정리되도록
+        for task in tasks.values():
+            task.cancel()
+    print("✅ 리포트 스트리밍 완료!")
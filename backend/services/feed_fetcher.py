@@ -0,0 +1,109 @@
+# backend/services/feed_fetcher.py
+
+import threading
+import time
+from collections import OrderedDict
+
+import feedparser
+
+from services import http_client
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# RSS/XML 피드 조건부 요청 (ETag / Last-Modified)
+# - 이전 응답의 검증값을 If-None-Match / If-Modified-Since 로 전송
+# - 304 Not Modified 이면 다운로드도, 파싱도 하지 않고 이전 파싱 결과를 그대로 반환
+MAX_ENTRIES = 256     # 기억해 둘 (URL, 파서) 조합 수 (오래 안 쓴 것부터 삭제)
+
+_entries = OrderedDict()   # (url, parse) -> {"etag", "last_modified", "parsed", "fetched_at"}
+_lock = threading.Lock()
+_stats = {"fetched": 0, "not_modified": 0, "failed": 0}
+
+
+def parse_feed(content):
+    """기본 파서 (RSS/Atom → feedparser 결과)"""
+    return feedparser.parse(content)
+
+
+def fetch(url, parse=parse_feed, headers=None, getter=None, **kwargs):
+    """
+    피드를 조건부 GET으로 가져와 parse(content) 결과를 반환
+    - parse: 응답 본문(bytes)을 받는 함수 (URL별로 같은 함수 객체를 넘겨야 캐시가 재사용됨)
+    - getter: 요청 함수 (기본 http_client.get, 호스트 속도 제한이 필요하면 crawl_scheduler.throttled_get)
+    - 200/304 외의 응답이면 None
+    반환된 파싱 결과는 다음 호출에서도 공유되므로 수정하지 말 것
+    """
+    getter = getter or http_client.get
+    key, entry, request_headers = _prepare(url, parse, headers)
+    res = getter(url, headers=request_headers, **kwargs)
+
+    done, parsed = _check_response(res, entry)
+    if done:
+        return parsed
+    return _store(key, res, parse(res.content))
+
+
+def _prepare(url, parse, headers):
+    """저장된 검증값으로 조건부 요청 헤더 구성"""
+    key = (url, parse)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        if entry["etag"]:
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+    return key, entry, request_headers
+
+
+def _check_response(res, entry):
+    """304면 (True, 이전 결과), 실패면 (True, None), 새 본문이면 (False, None)"""
+    if res.status_code == 304 and entry is not None:
+        with _lock:
+            entry["fetched_at"] = time.time()
+            _stats["not_modified"] += 1
+        return True, entry["parsed"]
+
+    if res.status_code != 200:
+        with _lock:
+            _stats["failed"] += 1
+        return True, None
+    return False, None
+
+
+def _store(key, res, parsed):
+    etag = res.headers.get("ETag")
+    last_modified = res.headers.get("Last-Modified")
+    with _lock:
+        _stats["fetched"] += 1
+        if etag or last_modified:
+            _entries[key] = {
+                "etag": etag, "last_modified": last_modified,
+                "parsed": parsed, "fetched_at": time.time()
+            }
+            _entries.move_to_end(key)
+            while len(_entries) > MAX_ENTRIES:
+                _entries.popitem(last=False)
+        else:
+            # 검증값을 주지 않는 서버는 조건부 요청 불가 → 기억하지 않음
+            _entries.pop(key, None)
+    return parsed
+
+
+def invalidate(url=None):
+    """저장된 검증값/파싱 결과 삭제 (url=None이면 전체)"""
+    with _lock:
+        for key in [k for k in _entries if url is None or k[0] == url]:
+            del _entries[key]
+
+
+def get_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_entries)
+    return stats
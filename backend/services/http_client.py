@@ -0,0 +1,118 @@
+# backend/services/http_client.py
+
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+# HTTP/2는 h2 패키지가 있을 때만 사용 (없으면 HTTP/1.1 keep-alive로 동작)
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+MAX_CONNECTIONS = 50              # 전체 풀 크기
+MAX_KEEPALIVE_CONNECTIONS = 20    # 유휴 상태로 유지할 연결 수
+MAX_CONNECTIONS_PER_HOST = 6      # 같은 호스트로 동시에 보낼 수 있는 요청 수
+
+MAX_RETRIES = 2                   # 재시도 횟수 (최초 요청 제외)
+BACKOFF_BASE = 0.5                # 재시도 대기 기본값(초)
+BACKOFF_MAX = 8.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_LIMITS = httpx.Limits(
+    max_connections=MAX_CONNECTIONS,
+    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=30.0
+)
+
+# =========================================================
+# 🔌 공용 클라이언트 (프로세스당 1개씩 유지)
+# =========================================================
+_client = None
+_lock = threading.Lock()
+
+_host_semaphores = {}
+
+
+def get_client():
+    """동기 공용 클라이언트 (커넥션 풀 재사용)"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = httpx.Client(
+                    headers=DEFAULT_HEADERS, timeout=DEFAULT_TIMEOUT, limits=_LIMITS,
+                    http2=HTTP2_ENABLED, follow_redirects=True
+                )
+    return _client
+
+
+def close():
+    """서버 종료 시 풀 정리"""
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+# =========================================================
+# 📡 요청 함수
+# =========================================================
+def get(url, params=None, headers=None, timeout=None, retries=MAX_RETRIES):
+    """
+    공용 풀을 사용하는 GET (호스트별 동시 요청 제한 + 지터 백오프 재시도)
+    마지막 시도까지 실패하면 예외를 그대로 올리거나 마지막 응답을 반환
+    """
+    client = get_client()
+    semaphore = _host_semaphore(url)
+
+    for attempt in range(retries + 1):
+        res = None   # 연결 오류 시 이전 시도의 Retry-After를 쓰지 않도록 매 시도마다 초기화
+        try:
+            with semaphore:
+                res = client.get(url, params=params, headers=headers, timeout=timeout or DEFAULT_TIMEOUT)
+            if res.status_code not in RETRY_STATUS or attempt == retries:
+                return res
+            print(f"   🔁 HTTP {res.status_code} ({_host(url)}) 재시도 {attempt + 1}/{retries}")
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise
+            print(f"   🔁 연결 오류 ({_host(url)}: {type(e).__name__}) 재시도 {attempt + 1}/{retries}")
+        time.sleep(_backoff(attempt, res))
+
+
+# =========================================================
+# 🛠️ 내부 유틸
+# =========================================================
+def _host(url):
+    return urlsplit(url).netloc
+
+
+def _host_semaphore(url):
+    host = _host(url)
+    sem = _host_semaphores.get(host)
+    if sem is None:
+        with _lock:
+            sem = _host_semaphores.setdefault(host, threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST))
+    return sem
+
+
+def _backoff(attempt, res=None):
+    """지수 백오프 + full jitter (429의 Retry-After 헤더가 있으면 우선)"""
+    if res is not None:
+        retry_after = res.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
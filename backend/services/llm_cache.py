@@ -0,0 +1,150 @@
+# backend/services/llm_cache.py
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from services import llm_gateway
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# 같은 (모델, 시스템 프롬프트, 사용자 입력, temperature) 요청은 디스크 캐시에서 바로 응답
+# → 재시도/중복 실행 시 LLM 지연과 비용이 0
+DB_PATH = "llm_cache.db"
+TTL_SECONDS = 6 * 60 * 60          # 캐시 유효시간 (같은 브리핑 시간대 재실행 대비)
+MAX_BYTES = 50 * 1024 * 1024       # 디스크 캐시 최대 크기 (초과 시 오래 안 쓴 항목부터 삭제)
+
+_conn = None
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "saved_seconds": 0.0}
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=10)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                size INTEGER,
+                latency REAL,
+                created_at REAL,
+                last_access REAL
+            )
+        ''')
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+        _conn.commit()
+    return _conn
+
+
+def make_key(model, messages, temperature):
+    """(모델, 시스템 프롬프트, 사용자 입력, temperature) 해시"""
+    system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+    user = "\n".join(m["content"] for m in messages if m["role"] != "system")
+    payload = json.dumps([model, system, user, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# =========================================================
+# 📖 조회 / 저장
+# =========================================================
+def get(key):
+    """유효한 캐시 응답 (없거나 만료면 None)"""
+    now = time.time()
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute("SELECT response, created_at, latency FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            _stats["misses"] += 1
+            return None
+        response, created_at, latency = row
+        if now - created_at > TTL_SECONDS:
+            with conn:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            _stats["expired"] += 1
+            _stats["misses"] += 1
+            return None
+        with conn:
+            conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+        _stats["hits"] += 1
+        _stats["saved_seconds"] += latency or 0.0
+        return response
+
+
+def put(key, model, response, latency=0.0):
+    now = time.time()
+    size = len(response.encode("utf-8"))
+    with _lock:
+        conn = _get_conn()
+        with conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO llm_cache (key, model, response, size, latency, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (key, model, response, size, latency, now, now))
+            _evict(conn, now)
+
+
+def _evict(conn, now):
+    """만료 항목 삭제 후, 용량 초과분은 LRU(last_access 오래된 순)로 삭제"""
+    conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - TTL_SECONDS,))
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+    if total <= MAX_BYTES:
+        return
+    freed = 0
+    victims = []
+    for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access"):
+        victims.append((key,))
+        freed += size
+        if total - freed <= MAX_BYTES:
+            break
+    conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+    _stats["evictions"] += len(victims)
+
+# =========================================================
+# 🤖 캐시를 거치는 Chat Completion
+# =========================================================
+def chat(model, messages, temperature, validate=None, **kwargs):
+    """
+    LLM 게이트웨이 chat completion 결과의 content 문자열을 반환 (캐시 우선)
+    validate(content) 가 False인 응답(JSON 파싱 실패 등)은 캐시하지 않음
+    """
+    key = make_key(model, messages, temperature)
+    cached = get(key)
+    if cached is not None:
+        return cached
+
+    t0 = time.monotonic()
+    response = llm_gateway.chat_completion(model, messages, temperature, **kwargs)
+    content = response.choices[0].message.content
+    latency = time.monotonic() - t0
+
+    if content and (validate is None or validate(content)):
+        put(key, model, content, latency)
+    return content
+
+
+def is_json(content):
+    """```json 코드블록 표기를 벗겨낸 뒤 JSON으로 파싱되는지 (캐시 저장 조건)"""
+    try:
+        json.loads(content.replace("```json", "").replace("```", "").strip())
+        return True
+    except ValueError:
+        return False
+
+
+def get_stats():
+    """적중률 등 캐시 지표"""
+    with _lock:
+        stats = dict(_stats)
+        row = _get_conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    stats["saved_seconds"] = round(stats["saved_seconds"], 2)
+    stats["entries"], stats["bytes"] = row
+    return stats
@@ -0,0 +1,178 @@
+# backend/services/llm_gateway.py
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+import httpx
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from services.crawl_scheduler import TokenBucket
+
+load_dotenv()
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# 모든 LLM 호출이 지나가는 단일 관문
+# - base_url 별로 클라이언트를 하나씩만 만들어 keep-alive 커넥션 풀 재사용
+# - 모델별 동시 호출 수 + 분당 요청 수(RPM) 제한
+# - 모델별 지연시간/토큰 사용량 히스토그램
+UPSTAGE_BASE_URL = "https://api.upstage.ai/v1/solar"
+API_KEY_ENV = {UPSTAGE_BASE_URL: "UPSTAGE_API_KEY"}
+
+MODEL_LIMITS = {
+    # model: (동시 호출 수, 분당 요청 수)
+    "solar-1-mini-chat": (4, 100),
+    "solar-pro2": (2, 60),
+}
+DEFAULT_MODEL_LIMIT = (2, 30)
+
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60)               # 초
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000)         # 토큰 수
+
+_lock = threading.Lock()
+_clients = {}         # base_url -> OpenAI
+_slots = {}           # model -> threading.BoundedSemaphore
+_buckets = {}         # model -> TokenBucket (RPM)
+_metrics = {}         # model -> 히스토그램/카운터
+
+# =========================================================
+# 🔌 클라이언트 (프로세스당 base_url 별 1개)
+# =========================================================
+def _api_key(base_url):
+    return os.getenv(API_KEY_ENV.get(base_url, "OPENAI_API_KEY"))
+
+
+def get_client(base_url=UPSTAGE_BASE_URL):
+    """공용 클라이언트 (커넥션 풀 재사용)"""
+    with _lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = OpenAI(
+                api_key=_api_key(base_url), base_url=base_url,
+                http_client=httpx.Client(limits=POOL_LIMITS, timeout=DEFAULT_TIMEOUT)
+            )
+            _clients[base_url] = client
+        return client
+
+
+def close():
+    """서버 종료 시 클라이언트 풀 정리"""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+# =========================================================
+# 🚦 모델별 제한
+# =========================================================
+def _limits(model):
+    return MODEL_LIMITS.get(model, DEFAULT_MODEL_LIMIT)
+
+
+def _slot(model):
+    with _lock:
+        if model not in _slots:
+            _slots[model] = threading.BoundedSemaphore(_limits(model)[0])
+        return _slots[model]
+
+
+def _bucket(model):
+    with _lock:
+        if model not in _buckets:
+            rpm = _limits(model)[1]
+            # 1분 한도를 초당 충전 속도로, 버스트는 동시 호출 수만큼
+            _buckets[model] = TokenBucket(rpm / 60.0, _limits(model)[0])
+        return _buckets[model]
+
+# =========================================================
+# 🤖 호출
+# =========================================================
+def chat_completion(model, messages, temperature=None, base_url=UPSTAGE_BASE_URL, **kwargs):
+    """chat.completions.create (RPM 토큰 → 동시 호출 슬롯 통과 후 호출, 지표 기록)"""
+    _bucket(model).acquire()
+    with _slot(model):
+        _track(model, "in_flight", 1)
+        t0 = time.monotonic()
+        try:
+            response = get_client(base_url).chat.completions.create(
+                model=model, messages=messages, temperature=temperature, **kwargs
+            )
+        except Exception:
+            _record(model, time.monotonic() - t0, None, error=True)
+            raise
+        finally:
+            _track(model, "in_flight", -1)
+    _record(model, time.monotonic() - t0, getattr(response, "usage", None))
+    return response
+
+# =========================================================
+# 📊 지표
+# =========================================================
+def _new_metrics():
+    return {
+        "requests": 0, "errors": 0, "in_flight": 0,
+        "latency_total": 0.0, "prompt_tokens": 0, "completion_tokens": 0,
+        "latency_hist": [0] * (len(LATENCY_BUCKETS) + 1),
+        "prompt_hist": [0] * (len(TOKEN_BUCKETS) + 1),
+        "completion_hist": [0] * (len(TOKEN_BUCKETS) + 1),
+    }
+
+
+def _track(model, field, delta):
+    with _lock:
+        m = _metrics.setdefault(model, _new_metrics())
+        m[field] += delta
+
+
+def _record(model, latency, usage, error=False):
+    with _lock:
+        m = _metrics.setdefault(model, _new_metrics())
+        m["requests"] += 1
+        m["latency_total"] += latency
+        m["latency_hist"][bisect_left(LATENCY_BUCKETS, latency)] += 1
+        if error:
+            m["errors"] += 1
+        if usage is not None:
+            prompt = getattr(usage, "prompt_tokens", 0) or 0
+            completion = getattr(usage, "completion_tokens", 0) or 0
+            m["prompt_tokens"] += prompt
+            m["completion_tokens"] += completion
+            m["prompt_hist"][bisect_left(TOKEN_BUCKETS, prompt)] += 1
+            m["completion_hist"][bisect_left(TOKEN_BUCKETS, completion)] += 1
+
+
+def _histogram(bounds, counts):
+    labels = [f"<={b}" for b in bounds] + [f">{bounds[-1]}"]
+    return dict(zip(labels, counts))
+
+
+def get_stats():
+    """모델별 호출 수/에러/평균 지연 + 지연시간·토큰 히스토그램"""
+    with _lock:
+        snapshot = {model: {**m, "latency_hist": list(m["latency_hist"]),
+                            "prompt_hist": list(m["prompt_hist"]),
+                            "completion_hist": list(m["completion_hist"])}
+                    for model, m in _metrics.items()}
+
+    stats = {}
+    for model, m in snapshot.items():
+        stats[model] = {
+            "requests": m["requests"],
+            "errors": m["errors"],
+            "in_flight": m["in_flight"],
+            "avg_latency": round(m["latency_total"] / m["requests"], 2) if m["requests"] else 0.0,
+            "prompt_tokens": m["prompt_tokens"],
+            "completion_tokens": m["completion_tokens"],
+            "latency_seconds": _histogram(LATENCY_BUCKETS, m["latency_hist"]),
+            "prompt_tokens_hist": _histogram(TOKEN_BUCKETS, m["prompt_hist"]),
+            "completion_tokens_hist": _histogram(TOKEN_BUCKETS, m["completion_hist"]),
+            "limits": {"concurrency": _limits(model)[0], "rpm": _limits(model)[1]},
+        }
+    return stats
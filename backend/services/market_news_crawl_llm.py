@@ -1,8 +1,6 @@
 # backend/services/market_new_crawl.py
 
-import feedparser
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
 import json
 import re
@@ -10,6 +8,8 @@ from html import unescape
 from datetime import datetime
 import pytz
 
+from services import article_index, dedup, feed_fetcher, llm_cache
+
 load_dotenv()
 
 # --- [전략 수정] Positive Filter 위주의 정밀 쿼리 ---
@@ -62,12 +62,18 @@ def get_market_news():
     """
     all_articles = []
     seen_links = set()
+    # 트랙 간 같은 사건 기사 + 지난 브리핑에서 이미 다룬 기사 제외
+    deduper = dedup.HeadlineDeduper("market")
 
     print("🚀 3-Track 미국 증시 뉴스 크롤링 (Positive Filter)...")
 
     try:
         for track in TRACKS:
-            feed = feedparser.parse(track["url"])
+            # 공용 풀 + 조건부 GET (변경 없으면 304 → 이전 파싱 결과 재사용)
+            feed = feed_fetcher.fetch(track["url"])
+            if feed is None:
+                print(f"⚠️ {track['name']} - RSS 응답 오류")
+                continue
             count = 0
             
             for entry in feed.entries:
@@ -78,6 +84,10 @@ def get_market_news():
                 if entry.link in seen_links:
                     continue
                 seen_links.add(entry.link)
+
+                # 유사 제목 체크
+                if deduper.check_and_add(entry.title):
+                    continue
                 
                 # 날짜 변환
                 pub_date = entry.published if 'published' in entry else ""
@@ -104,6 +114,10 @@ def get_market_news():
 
         # AI 분석 요청
         ai_result = analyze_with_upstage_summary(all_articles)
+
+        # 요약까지 성공한 경우에만 '이미 다룬 기사'로 기록 (실패 시 다음 실행에서 다시 후보가 되도록)
+        if ai_result.get("analyzed"):
+            deduper.commit()
         
         return {
             "status": "success",
@@ -115,23 +129,54 @@ def get_market_news():
         print(f"News Crawl Error: {e}")
         return {"status": "error", "message": str(e)}
 
+def build_news_list(articles, translations):
+    """번역 결과(URL → 한국어 제목)를 붙인 최종 기사 목록"""
+    return [
+        {
+            "title": translations.get(article["link"], article["title"]),
+            "original_title": article["title"],
+            "link": article["link"],
+            "track": article["track"],
+            "pub_date": article["pub_date"]
+        }
+        for article in articles
+    ]
+
 def analyze_with_upstage_summary(articles):
     """
     Upstage Solar API: 종합 요약 + 번역
+    - 이전 실행에서 번역한 기사는 기사 인덱스의 번역을 재사용하고, 새 기사만 번역 요청
+    - 기사 묶음이 이전과 같으면 LLM 호출 없이 저장된 요약 사용
+    반환: {"market_summary", "news_list", "analyzed"} (analyzed: 요약을 실제로 만들었거나 재사용했으면 True)
     """
+    links = [a["link"] for a in articles]
+    known = article_index.lookup(links)
+    translations = {
+        url: info["korean_title"] for url, info in known.items()
+        if info["processed"] and info["korean_title"]
+    }
+    new_articles = [a for a in articles if a["link"] not in translations]
+
+    cached_summary = article_index.get_set_summary(links)
+    if not new_articles and cached_summary is not None:
+        print(f"   ♻️ [Article Index] 새 기사 없음 → 저장된 요약/번역 재사용 ({len(articles)}건)")
+        article_index.record(articles)
+        return {"market_summary": cached_summary, "news_list": build_news_list(articles, translations), "analyzed": True}
+    print(f"   🆕 [Article Index] 새 기사 {len(new_articles)}건 / 번역 재사용 {len(translations)}건")
+
     api_key = os.getenv("UPSTAGE_API_KEY")
     if not api_key:
         print("⚠️ Upstage API Key missing")
-        return {"market_summary": "API Key 없음", "news_list": articles}
-
-    client = OpenAI(
-        api_key=api_key,
-        base_url="https://api.upstage.ai/v1/solar"
-    )
+        return {"market_summary": "API Key 없음", "news_list": articles, "analyzed": False}
 
+    # 요약은 전체 기사 기준, 번역은 [NEW] 표시된 기사만 (ID로 매핑)
+    ids = {}
     context_text = ""
     for i, a in enumerate(articles):
-        context_text += f"[News {i+1}] ({a['track']}) - {a['pub_date']}\nTitle: {a['title']}\nContent: {a['summary_raw'][:300]}\n\n"
+        news_id = f"N{i+1}"
+        ids[news_id] = a["link"]
+        new_tag = " [NEW]" if a["link"] not in translations else ""
+        context_text += f"[{news_id}]{new_tag} ({a['track']}) - {a['pub_date']}\nTitle: {a['title']}\nContent: {a['summary_raw'][:300]}\n\n"
 
     # [프롬프트] 'Market Close' 시점을 명시적으로 강조
     system_prompt = """
@@ -144,52 +189,48 @@ def analyze_with_upstage_summary(articles):
     - Write a cohesive paragraph (3-4 sentences) **in Korean**.
 
     Task 2: Headline Translation
-    - Translate the titles into professional Korean business language.
+    - Translate the titles of the news marked [NEW] into professional Korean business language.
+    - Do not translate news without the [NEW] mark. Copy each news ID exactly.
 
     Output MUST be in JSON format:
     {
         "market_summary": "한국어 요약...",
         "news_list": [
-            {"korean_title": "...", "original_title": "..."}
+            {"id": "N1", "korean_title": "...", "original_title": "..."}
         ]
     }
     """
 
     try:
-        response = client.chat.completions.create(
+        content = llm_cache.chat(
             model="solar-pro2",
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": f"Here is the collected news data:\n{context_text}"}
             ],
-            temperature=0.1
+            temperature=0.1,
+            validate=llm_cache.is_json
         )
         
-        content = response.choices[0].message.content
         cleaned_content = content.replace("```json", "").replace("```", "").strip()
         ai_data = json.loads(cleaned_content)
         
-        final_news_list = []
-        ai_list = ai_data.get("news_list", [])
-        
-        for i, article in enumerate(articles):
-            korean_title = article["title"]
-            if i < len(ai_list):
-                korean_title = ai_list[i].get("korean_title", article["title"])
-            
-            final_news_list.append({
-                "title": korean_title,
-                "original_title": article["title"],
-                "link": article["link"],
-                "track": article["track"],
-                "pub_date": article["pub_date"]
-            })
+        new_translations = {}
+        for item in ai_data.get("news_list", []):
+            url = ids.get(str(item.get("id", "")).strip())
+            if url and url not in translations and item.get("korean_title"):
+                new_translations[url] = item["korean_title"]
+        translations.update(new_translations)
+
+        market_summary = ai_data.get("market_summary", "-")
+        article_index.record(articles, new_translations, market_summary)
 
         return {
-            "market_summary": ai_data.get("market_summary", "-"),
-            "news_list": final_news_list
+            "market_summary": market_summary,
+            "news_list": build_news_list(articles, translations),
+            "analyzed": True
         }
 
     except Exception as e:
         print(f"Upstage AI Logic Error: {e}")
-        return {"market_summary": "AI 분석 중 오류 발생", "news_list": articles}
\ No newline at end of file
+        return {"market_summary": "AI 분석 중 오류 발생", "news_list": articles, "analyzed": False}
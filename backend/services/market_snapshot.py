@@ -0,0 +1,111 @@
+# backend/services/market_snapshot.py
+
+import numpy as np
+import pandas as pd
+
+from services import async_runner, price_store
+
+# 종가 컬럼 우선순위 ('Close'가 없으면 'Adj Close')
+PRICE_COLUMNS = ("Close", "Adj Close")
+
+
+def download_closes(symbols, period="5d"):
+    """yfinance에서 여러 종목을 한 번에 받아 (날짜 x 종목) 종가 프레임으로 반환 (price_store와 같은 다운로드 락 사용)"""
+    df = price_store.yf_download(symbols, period=period, group_by='ticker', threads=True, progress=False, auto_adjust=False)
+    return extract_closes(df, symbols)
+
+
+def extract_closes(df, symbols):
+    """
+    yf.download 결과(MultiIndex 또는 단일 종목 프레임)에서 종가만 뽑아 (날짜 x 종목) 프레임으로 변환
+    없는 종목은 NaN 컬럼으로 채움
+    """
+    symbols = list(symbols)
+    if df is None or df.empty:
+        return pd.DataFrame(np.nan, index=pd.Index([]), columns=symbols)
+
+    if isinstance(df.columns, pd.MultiIndex):
+        # group_by='ticker' → (종목, 필드) 순서 / 기본값 → (필드, 종목) 순서
+        field_level = 1 if set(df.columns.get_level_values(1)) & set(PRICE_COLUMNS) else 0
+        fields = df.columns.get_level_values(field_level)
+        closes = None
+        for col in PRICE_COLUMNS:
+            if col in fields:
+                closes = df.xs(col, axis=1, level=field_level)
+                break
+        if closes is None:
+            return pd.DataFrame(np.nan, index=df.index, columns=symbols)
+    else:
+        # 단일 종목 다운로드는 MultiIndex가 아님
+        col = next((c for c in PRICE_COLUMNS if c in df.columns), df.columns[-1])
+        closes = df[[col]].set_axis(symbols[:1], axis=1)
+
+    return closes.reindex(columns=symbols).astype(float)
+
+
+def compute_snapshot(closes):
+    """
+    (날짜 x 종목) 종가 프레임에서 종목별 마지막 종가 / 직전 종가 / 변동폭 / 변동률을 한 번에 계산
+    종목마다 휴장일이 달라 NaN 위치가 제각각이므로, 종목별 '마지막 유효값'과 '그 이전 유효값'을 찾음
+
+    반환: index=종목, columns=[last_close, prev_close, change, change_pct, valid_count]
+    """
+    values = closes.to_numpy(dtype=float)
+    n_rows, n_cols = values.shape if values.ndim == 2 else (0, len(closes.columns))
+
+    if n_rows == 0:
+        result = pd.DataFrame(np.nan, index=closes.columns,
+                              columns=["last_close", "prev_close", "change", "change_pct"])
+        result["valid_count"] = 0
+        return result
+
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+
+    # 유효값 누적 개수로 '마지막(count)'과 '직전(count-1)' 위치를 표시
+    rank = np.cumsum(valid, axis=0)
+    is_last = valid & (rank == counts)
+    is_prev = valid & (rank == counts - 1)
+
+    row_idx = np.arange(n_rows)[:, None]
+    last_pos = np.where(is_last, row_idx, -1).max(axis=0)
+    prev_pos = np.where(is_prev, row_idx, -1).max(axis=0)
+
+    cols = np.arange(n_cols)
+    last_close = np.where(last_pos >= 0, values[np.clip(last_pos, 0, None), cols], np.nan)
+    # 데이터가 하루치뿐이면 직전 종가 = 마지막 종가 (변동률 0%)
+    prev_close = np.where(prev_pos >= 0, values[np.clip(prev_pos, 0, None), cols], last_close)
+
+    change = last_close - prev_close
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_pct = np.where(prev_close != 0, change / prev_close * 100, 0.0)
+
+    return pd.DataFrame({
+        "last_close": last_close,
+        "prev_close": prev_close,
+        "change": change,
+        "change_pct": change_pct,
+        "valid_count": counts
+    }, index=closes.columns)
+
+
+def get_snapshot(symbols, period="5d"):
+    """종목 리스트 → 스냅샷 프레임 (다운로드 + 계산)"""
+    return compute_snapshot(download_closes(symbols, period=period))
+
+
+async def aget_snapshot(symbols, period="5d"):
+    """get_snapshot()의 async 버전 (yfinance 다운로드는 블로킹 전용 풀에서 실행)"""
+    return await async_runner.run_blocking(get_snapshot, symbols, period)
+
+
+def get_snapshot_from_store(symbols, sync=True):
+    """
+    로컬 일봉 저장소(price_store) 기준 스냅샷
+    종목 수가 많을 때(히트맵 등) 매번 전체 기간을 받지 않고 없는 구간만 동기화 후 디스크에서 계산
+    """
+    symbols = list(symbols)
+    if sync:
+        price_store.sync(symbols)
+    dates, closes = price_store.read_close_matrix(symbols, limit=2)
+    return compute_snapshot(pd.DataFrame(closes, index=pd.Index(dates), columns=symbols))
@@ -0,0 +1,258 @@
+# backend/services/price_store.py
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytz
+import yfinance as yf
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# 종목별 일봉(OHLCV)을 로컬에 쌓아두고, 매 실행마다 '없는 구간'만 받아옴
+DB_PATH = "price_store.db"
+DEFAULT_LOOKBACK_DAYS = 400   # 처음 받는 종목은 1년+여유분
+EXCHANGE_TZ = pytz.timezone("America/New_York")   # 봉 날짜 기준 (서버 시간대와 무관)
+SYNC_INTERVAL = timedelta(minutes=10)             # 마지막 동기화 후 이 시간이 지나면 꼬리 구간 재요청
+FIELDS = ("open", "high", "low", "close", "volume")
+_YF_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+_conn = None
+_lock = threading.Lock()
+# yfinance download()는 모듈 전역 상태(shared._DFS 등)를 매번 초기화하므로
+# 동시에 두 번 호출되면 서로의 결과를 덮어씀 → 프로세스 전체에서 한 번에 하나만
+_YF_LOCK = threading.Lock()
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS bars (
+                symbol TEXT,
+                date TEXT,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume REAL,
+                PRIMARY KEY (symbol, date)
+            ) WITHOUT ROWID
+        ''')
+        # synced_on: 마지막 동기화 시각 (UTC, '%Y-%m-%d %H:%M:%S')
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                symbol TEXT PRIMARY KEY,
+                last_date TEXT,
+                synced_on TEXT
+            )
+        ''')
+        _conn.commit()
+    return _conn
+
+# =========================================================
+# 📥 동기화 (없는 꼬리 구간만 다운로드)
+# =========================================================
+def yf_download(symbols, **kwargs):
+    """yf.download 공용 진입점 (_YF_LOCK으로 직렬화, 모든 일봉 다운로드는 여기를 거침)"""
+    with _YF_LOCK:
+        return yf.download(list(symbols), **kwargs)
+
+
+def sync(symbols, lookback_days=DEFAULT_LOOKBACK_DAYS, force=False):
+    """
+    종목들의 일봉을 최신 상태로 맞춤
+    - 처음 보는 종목: lookback_days 만큼 전체 다운로드
+    - 이미 있는 종목: 마지막 저장일부터(당일 미완성 봉 덮어쓰기) 오늘까지만 다운로드
+    - 건너뛰는 경우: 마지막 봉이 진행 중인 거래소 세션이 아니고, SYNC_INTERVAL 안에 동기화한 종목
+    같은 시작일을 가진 종목끼리 묶어서 yf.download 한 번으로 요청
+    반환: 새로 저장한 봉 개수
+    """
+    now = datetime.now(pytz.utc)
+    session = now.astimezone(EXCHANGE_TZ).strftime('%Y-%m-%d')
+    synced_on = now.strftime('%Y-%m-%d %H:%M:%S')
+    state = _load_state(symbols)
+
+    groups = {}
+    for symbol in dict.fromkeys(symbols):
+        last_date, last_synced = state.get(symbol, (None, None))
+        if not force and _is_fresh(last_date, last_synced, now, session):
+            continue
+        if last_date:
+            start = last_date
+        else:
+            start = (datetime.now() - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
+        groups.setdefault(start, []).append(symbol)
+
+    saved = 0
+    for start, group in groups.items():
+        try:
+            df = yf_download(group, start=start, group_by='ticker', threads=True, progress=False, auto_adjust=False)
+        except Exception as e:
+            print(f"   ⚠️ [PriceStore] 다운로드 실패 ({len(group)}종목, {start}~): {e}")
+            continue
+        saved += _save_frame(df, group, synced_on)
+
+    return saved
+
+
+def _is_fresh(last_date, last_synced, now, session):
+    """다시 받을 필요가 없는지 (오늘 세션 봉은 값이 계속 바뀌므로 항상 다시 받음)"""
+    if last_date is None or last_date >= session:
+        return False
+    try:
+        synced_at = pytz.utc.localize(datetime.strptime(last_synced, '%Y-%m-%d %H:%M:%S'))
+    except (TypeError, ValueError):
+        return False   # 기록 없음 / 이전 형식(날짜만)
+    return now - synced_at < SYNC_INTERVAL
+
+
+def _save_frame(df, symbols, synced_on):
+    rows = []
+    state_rows = []
+    for symbol in symbols:
+        data = _symbol_frame(df, symbol, len(symbols))
+        if data is None or data.empty:
+            continue
+        data = data.dropna(subset=["Close"]) if "Close" in data.columns else data.dropna(how="all")
+        if data.empty:
+            continue
+
+        dates = pd.DatetimeIndex(data.index).strftime('%Y-%m-%d')
+        cols = [data[_YF_COLUMNS[f]].to_numpy(dtype=float) if _YF_COLUMNS[f] in data.columns
+                else np.full(len(data), np.nan) for f in FIELDS]
+        rows.extend((symbol, d, *vals) for d, *vals in zip(dates, *[c.tolist() for c in cols]))
+        state_rows.append((symbol, dates[-1], synced_on))
+
+    if not rows:
+        return 0
+
+    with _lock:
+        conn = _get_conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO bars (symbol, date, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO sync_state (symbol, last_date, synced_on) VALUES (?, ?, ?)",
+                state_rows
+            )
+    return len(rows)
+
+
+def _symbol_frame(df, symbol, n_symbols):
+    if df is None or df.empty:
+        return None
+    if isinstance(df.columns, pd.MultiIndex):
+        if symbol not in df.columns.get_level_values(0):
+            return None
+        return df[symbol]
+    return df if n_symbols == 1 else None
+
+
+def _load_state(symbols):
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+    placeholders = ",".join("?" * len(symbols))
+    with _lock:
+        cur = _get_conn().execute(
+            f"SELECT symbol, last_date, synced_on FROM sync_state WHERE symbol IN ({placeholders})", symbols
+        )
+        return {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+
+# =========================================================
+# 📤 조회 (NumPy 배열)
+# =========================================================
+def read_bars(symbol, fields=("close", "volume"), limit=None):
+    """
+    저장된 일봉을 날짜 오름차순 NumPy 배열로 반환
+    limit: 최근 N개만 조회
+    반환: {"date": ndarray[str], "close": ndarray[float], ...}
+    """
+    fields = [f for f in fields if f in FIELDS]
+    columns = ", ".join(["date"] + fields)
+    sql = f"SELECT {columns} FROM bars WHERE symbol = ? ORDER BY date DESC"
+    params = [symbol]
+    if limit:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    with _lock:
+        rows = _get_conn().execute(sql, params).fetchall()
+    rows.reverse()
+
+    result = {"date": np.array([r[0] for r in rows], dtype=str)}
+    for i, f in enumerate(fields, start=1):
+        result[f] = np.array([r[i] for r in rows], dtype=float)
+    return result
+
+
+def read_bars_from(symbol, start, fields=("volume",), inclusive=True, limit=None):
+    """
+    start 날짜부터(inclusive=False면 다음 날부터) 오름차순으로 조회
+    limit: 가장 오래된 N개만 조회
+    """
+    fields = [f for f in fields if f in FIELDS]
+    columns = ", ".join(["date"] + fields)
+    op = ">=" if inclusive else ">"
+    sql = f"SELECT {columns} FROM bars WHERE symbol = ? AND date {op} ? ORDER BY date"
+    params = [symbol, start]
+    if limit:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    with _lock:
+        rows = _get_conn().execute(sql, params).fetchall()
+
+    result = {"date": np.array([r[0] for r in rows], dtype=str)}
+    for i, f in enumerate(fields, start=1):
+        result[f] = np.array([r[i] for r in rows], dtype=float)
+    return result
+
+
+def read_volumes(symbol, limit=None):
+    """거래량만 float 배열로 반환"""
+    return read_bars(symbol, fields=("volume",), limit=limit)["volume"]
+
+
+def last_dates(symbols):
+    """종목별 마지막 저장일 {symbol: 'YYYY-MM-DD'}"""
+    return {s: st[0] for s, st in _load_state(symbols).items()}
+
+
+def read_close_matrix(symbols, limit=5):
+    """
+    여러 종목의 최근 종가를 (날짜 x 종목) 2차원 배열로 반환 (없는 칸은 NaN)
+    반환: (dates ndarray[str], closes ndarray[float] shape=(len(dates), len(symbols)))
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return np.array([], dtype=str), np.empty((0, 0))
+    placeholders = ",".join("?" * len(symbols))
+    # 종목별 최근 limit개 (윈도우 함수로 한 번에 조회)
+    sql = f'''
+        SELECT symbol, date, close FROM (
+            SELECT symbol, date, close,
+                   ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY date DESC) AS rn
+            FROM bars WHERE symbol IN ({placeholders})
+        ) WHERE rn <= ?
+    '''
+    with _lock:
+        rows = _get_conn().execute(sql, [*symbols, int(limit)]).fetchall()
+
+    dates = np.array(sorted({r[1] for r in rows}), dtype=str)
+    closes = np.full((len(dates), len(symbols)), np.nan)
+    if rows:
+        sym_idx = {s: i for i, s in enumerate(symbols)}
+        r_sym = np.array([sym_idx[r[0]] for r in rows])
+        r_date = np.searchsorted(dates, np.array([r[1] for r in rows], dtype=str))
+        closes[r_date, r_sym] = np.array([r[2] for r in rows], dtype=float)
+    return dates, closes
@@ -0,0 +1,83 @@
+# backend/services/renderer.py
+
+import os
+from html import escape
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# 템플릿 환경은 프로세스당 한 번만 생성
+# - 컴파일 결과는 메모리 캐시 + 디스크 바이트코드 캐시(재시작 후에도 재컴파일 없음)
+# - auto_reload: 템플릿 파일 수정 시간이 바뀐 경우에만 다시 컴파일
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), '../templates')
+BYTECODE_CACHE_DIR = ".jinja_cache"
+
+_loader = FileSystemLoader(TEMPLATE_DIR)
+_env = None
+_async_env = None
+
+
+def _bytecode_cache(kind):
+    # 바이트코드 캐시 키에는 async 여부가 포함되지 않으므로 환경별로 파일 이름을 분리
+    # (같은 파일을 공유하면 async로 컴파일된 코드를 일반 렌더링이 읽어 오류 발생)
+    os.makedirs(BYTECODE_CACHE_DIR, exist_ok=True)
+    return FileSystemBytecodeCache(BYTECODE_CACHE_DIR, pattern=f"__jinja2_{kind}_%s.cache")
+
+
+def get_environment():
+    """일반 렌더링용 환경"""
+    global _env
+    if _env is None:
+        _env = Environment(loader=_loader, bytecode_cache=_bytecode_cache("sync"), auto_reload=True)
+    return _env
+
+
+def get_async_environment():
+    """스트리밍 렌더링용 환경 (async 모드, 템플릿 로더/바이트코드 캐시 위치는 동일)"""
+    global _async_env
+    if _async_env is None:
+        _async_env = Environment(loader=_loader, bytecode_cache=_bytecode_cache("async"), auto_reload=True, enable_async=True)
+    return _async_env
+
+
+def render(template_name, **context):
+    return get_environment().get_template(template_name).render(**context)
+
+
+def generate_async(template_name, **context):
+    """HTML 조각을 만들어지는 대로 내보내는 async 제너레이터"""
+    return get_async_environment().get_template(template_name).generate_async(**context)
+
+# =========================================================
+# 📋 표 렌더링 (행 데이터 → HTML / 마크다운)
+# =========================================================
+# columns: [(제목, 정렬), ...] / rows: [[셀, 셀, ...], ...]
+# 같은 행 데이터로 이메일(HTML)과 JSON 응답(마크다운)을 모두 만들 수 있도록 분리
+_MD_ALIGN = {"left": ":---", "center": ":---:", "right": "---:"}
+
+
+def render_table(columns, rows):
+    """행 데이터 → HTML <table> 조각 (기존 markdown tables 확장 출력과 같은 마크업)"""
+    def cells(tag, values):
+        return "\n".join(
+            f'<{tag} style="text-align: {align};">{escape(str(value), quote=False)}</{tag}>'
+            for (_, align), value in zip(columns, values)
+        )
+
+    parts = ["<table>", "<thead>", "<tr>", cells("th", [title for title, _ in columns]), "</tr>", "</thead>", "<tbody>"]
+    for row in rows:
+        parts += ["<tr>", cells("td", row), "</tr>"]
+    parts += ["</tbody>", "</table>"]
+    return "\n".join(parts)
+
+
+def render_markdown_table(columns, rows):
+    """행 데이터 → 마크다운 표 (n8n 등 JSON 응답용)"""
+    lines = [
+        "| " + " | ".join(title for title, _ in columns) + " |",
+        "| " + " | ".join(_MD_ALIGN[align] for _, align in columns) + " |",
+    ]
+    lines += ["| " + " | ".join(str(value) for value in row) + " |" for row in rows]
+    return "\n".join(lines)
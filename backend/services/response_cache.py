@@ -0,0 +1,120 @@
+# backend/services/response_cache.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from services import async_runner
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# X-Cache 헤더 값
+HIT = "HIT"              # 유효기간 내 캐시 응답
+STALE = "STALE"          # 만료됐지만 허용 범위 → 캐시 응답 + 백그라운드 갱신
+MISS = "MISS"            # 새로 계산
+COALESCED = "COALESCED"  # 같은 요청이 이미 계산 중 → 그 결과를 공유
+BYPASS = "BYPASS"        # no_cache 요청으로 캐시 무시 (결과는 저장)
+
+# 백그라운드 갱신(stale-while-revalidate) 전용 워커
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+_lock = threading.Lock()
+_entries = {}    # key -> {"value": ..., "stored_at": monotonic}
+_inflight = {}   # key -> Future (계산 중인 요청)
+
+
+def get_or_compute(key, compute, ttl, stale_ttl=0, bypass=False, cacheable=None):
+    """
+    캐시 조회 후 없으면 계산 (동일 key 동시 요청은 한 번만 계산)
+
+    - ttl: 캐시를 그대로 쓰는 시간(초)
+    - stale_ttl: ttl 이후 추가로 이전 값을 내보내면서 백그라운드로 갱신하는 시간(초)
+    - bypass: True면 캐시를 무시하고 새로 계산
+    - cacheable: 결과를 저장할지 판단하는 함수 (에러 응답은 저장하지 않도록)
+
+    반환: (value, status, age_seconds)
+    """
+    hit, future, owner = _acquire(key, compute, ttl, stale_ttl, bypass, cacheable)
+    if hit is not None:
+        return hit
+
+    if owner:
+        _run(key, compute, cacheable, future)
+        status = BYPASS if bypass else MISS
+    else:
+        status = COALESCED
+
+    return future.result(), status, 0.0
+
+
+async def aget_or_compute(key, compute, ttl, stale_ttl=0, bypass=False, cacheable=None):
+    """
+    get_or_compute()의 async 버전 (async 라우트용)
+    - compute(동기 함수)는 async_runner 전용 풀에서 실행 → 이벤트 루프를 막지 않음
+    - 동기/비동기 호출자가 같은 캐시와 계산 중 Future를 공유
+    """
+    hit, future, owner = _acquire(key, compute, ttl, stale_ttl, bypass, cacheable)
+    if hit is not None:
+        return hit
+
+    if owner:
+        await async_runner.run_blocking(_run, key, compute, cacheable, future)
+        status = BYPASS if bypass else MISS
+    else:
+        status = COALESCED
+
+    return await asyncio.wrap_future(future), status, 0.0
+
+
+def _acquire(key, compute, ttl, stale_ttl, bypass, cacheable):
+    """
+    캐시 적중이면 ((value, status, age), None, False)
+    아니면 (None, future, owner) → owner=True 인 호출자만 직접 계산
+    """
+    with _lock:
+        entry = _entries.get(key)
+        age = time.monotonic() - entry["stored_at"] if entry else 0.0
+
+        if entry and not bypass:
+            if age < ttl:
+                return (entry["value"], HIT, age), None, False
+            if age < ttl + stale_ttl:
+                if key not in _inflight:
+                    future = Future()
+                    _inflight[key] = future
+                    _refresh_executor.submit(_run, key, compute, cacheable, future)
+                return (entry["value"], STALE, age), None, False
+
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _inflight[key] = future
+    return None, future, owner
+
+
+def invalidate(key=None):
+    """특정 key 또는 전체 캐시 삭제"""
+    with _lock:
+        if key is None:
+            _entries.clear()
+        else:
+            _entries.pop(key, None)
+
+
+def _run(key, compute, cacheable, future):
+    try:
+        value = compute()
+        if cacheable is None or cacheable(value):
+            with _lock:
+                _entries[key] = {"value": value, "stored_at": time.monotonic()}
+        future.set_result(value)
+    except Exception as e:
+        print(f"   ⚠️ [Cache] {key} 계산 실패: {e}")
+        future.set_exception(e)
+    finally:
+        with _lock:
+            if _inflight.get(key) is future:
+                del _inflight[key]
@@ -1,14 +1,15 @@
-import feedparser
-import requests
-import os
 import json
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from time import mktime
 from bs4 import BeautifulSoup
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from services import crawl_scheduler, feed_fetcher, llm_cache, velocity_store
+
 load_dotenv()
 
 # =========================================================
@@ -41,7 +42,13 @@ TARGET_STOCKS = [
 
 MODEL_FAST = "solar-1-mini-chat"
 MODEL_SMART = "solar-pro2"
-HISTORY_FILE = "velocity_history.json"  # 속도 기록 저장 파일
+
+# 단계별 동시 실행 제한 (종목 파이프라인)
+# 모델별 LLM 동시 호출/RPM 제한은 llm_gateway.MODEL_LIMITS 에서 관리
+PIPELINE_WORKERS = 8                                  # 동시에 진행 중인 종목 수
+CRAWL_CONCURRENCY = {"reddit": 2, "naver": 2}         # 소스 호스트별 동시 수집
+
+_crawl_slots = {k: threading.BoundedSemaphore(v) for k, v in CRAWL_CONCURRENCY.items()}
 
 SPAM_KEYWORDS = ["whatsapp", "telegram", "giveaway", "free", "discord", "리딩", "무료", "카톡", "밴드", "가입", "고수익", "입장"]
 
@@ -74,92 +81,21 @@ def parse_json_safely(text):
         return None
 
 # ---------------------------------------------------------
-# [신규 기능] 파일 기반 속도 데이터 관리
+# 속도 데이터 관리 (services/velocity_store: SQLite 기반)
 # ---------------------------------------------------------
-def load_velocity_history():
-    """기록된 속도 데이터를 불러옵니다."""
-    if not os.path.exists(HISTORY_FILE):
-        return {}
-    try:
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
-        return {}
-
-def save_velocity_history(history):
-    """속도 데이터를 파일에 저장합니다."""
-    try:
-        with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(history, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"⚠️ History Save Error: {e}")
-
 def get_dynamic_avg_velocity(ticker, default_val):
     """
     [핵심] 저장된 기록을 바탕으로 '동적 평균 속도'를 계산합니다.
-    최근 10번의 기록 평균을 사용합니다.
+    최근 14일(2주) 치 평균 사용, 기록 없으면 설정값 사용
     """
-    history = load_velocity_history()
-    records = history.get(ticker, [])
-    
-    if not records:
-        return default_val # 기록 없으면 설정값 사용
-    
-    # [변경] 딕셔너리 리스트에서 'velocity' 값만 추출
-    # 예: [{'date': '...', 'velocity': 10}, ...] -> [10, 15, ...]
-    velocities = []
-    for r in records:
-        if isinstance(r, dict) and 'velocity' in r:
-            velocities.append(r['velocity'])
-        elif isinstance(r, (int, float)): # 호환성: 옛날 숫자 데이터가 있다면 포함
-            velocities.append(r)
-            
-    if not velocities:
-        return default_val
-
-    # 최근 14일(2주) 치 평균 사용
-    recent_velocities = velocities[-14:]
-    avg = sum(recent_velocities) / len(recent_velocities)
-    
-    return avg
+    return velocity_store.get_avg_velocity(ticker, default_val)
 
 def update_velocity_history(ticker, current_velocity):
     """
     오늘 날짜의 기록이 이미 있으면 '갱신(덮어쓰기)'하고,
     없으면 '추가(Append)'합니다.
     """
-    if current_velocity <= 0: return
-
-    history = load_velocity_history()
-    if ticker not in history:
-        history[ticker] = []
-    
-    today_str = datetime.now().strftime("%Y-%m-%d")
-    records = history[ticker]
-    
-    # [핵심 로직] 마지막 기록이 오늘인지 확인
-    is_today_exist = False
-    
-    if records:
-        last_record = records[-1]
-        # 기록이 딕셔너리 형태이고, 날짜가 오늘이면
-        if isinstance(last_record, dict) and last_record.get('date') == today_str:
-            # 오늘의 기록을 최신 값으로 업데이트 (덮어쓰기)
-            last_record['velocity'] = current_velocity
-            is_today_exist = True
-            
-    # 오늘 기록이 없으면 새로 추가
-    if not is_today_exist:
-        records.append({
-            "date": today_str,
-            "velocity": current_velocity
-        })
-    
-    # 최근 60일 데이터만 유지
-    if len(records) > 60:
-        history[ticker] = records[-60:]
-        
-    save_velocity_history(history)
+    velocity_store.record_velocity(ticker, current_velocity)
 
 def check_volume_spike(ticker, posts, default_velocity):
     if len(posts) < 5: return "데이터 부족", 0
@@ -206,12 +142,8 @@ def get_reddit_posts(ticker, limit):
     print(f"🔍 [Reddit] {ticker} 수집 시도 (Max 100)...")
     
     try:
-        resp = requests.get(rss_url, headers=headers, timeout=10)
-        if resp.status_code != 200:
-            return []
-
-        feed = feedparser.parse(resp.content)
-        if not feed.entries:
+        feed = feed_fetcher.fetch(rss_url, headers=headers, getter=crawl_scheduler.throttled_get, timeout=10)
+        if feed is None or not feed.entries:
             return []
 
         for entry in feed.entries:
@@ -242,7 +174,7 @@ def get_naver_posts(code, limit):
     while len(posts) < limit and page <= 5:
         try:
             url = f"https://finance.naver.com/item/board.naver?code={code}&page={page}"
-            res = requests.get(url, headers=headers, timeout=5)
+            res = crawl_scheduler.throttled_get(url, headers=headers, timeout=5)
             if res.status_code != 200: break
 
             try:
@@ -278,9 +210,6 @@ def get_naver_posts(code, limit):
     return posts
 
 def summarize_with_llm(ticker, posts):
-    api_key = os.getenv("UPSTAGE_API_KEY")
-    client = OpenAI(api_key=api_key, base_url="https://api.upstage.ai/v1/solar")
-
     full_content = "\n".join([f"- {p['text']}" for p in posts])
     if len(full_content) > 3000:
         full_content = full_content[:3000] + "...(truncated)"
@@ -291,74 +220,114 @@ def summarize_with_llm(ticker, posts):
     Output format must be a pure JSON list: ["Opinion 1", "Opinion 2"]
     """
     try:
-        response = client.chat.completions.create(
+        content = llm_cache.chat(
             model=MODEL_FAST,
             messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": full_content}],
-            temperature=0.1, timeout=30
+            temperature=0.1, timeout=30,
+            validate=lambda c: parse_json_safely(c) is not None
         )
-        return parse_json_safely(response.choices[0].message.content) or []
+        return parse_json_safely(content) or []
     except:
         return []
 
 def analyze_final_sentiment(ticker, key_sentences):
-    api_key = os.getenv("UPSTAGE_API_KEY")
-    client = OpenAI(api_key=api_key, base_url="https://api.upstage.ai/v1/solar")
-
     sentences_text = "\n".join([f"{i+1}. {s}" for i, s in enumerate(key_sentences)])
     system_prompt = f"""
     Analyze investor sentiment for {ticker}.
     Output JSON: {{ "score": <0-100>, "status": "<Extreme Fear/Fear/Neutral/Greed/Extreme Greed>", "reason_korean": "..." }}
     """
     try:
-        response = client.chat.completions.create(
+        content = llm_cache.chat(
             model=MODEL_SMART,
             messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": sentences_text}],
-            temperature=0.1, timeout=30
+            temperature=0.1, timeout=30,
+            validate=lambda c: parse_json_safely(c) is not None
         )
-        return parse_json_safely(response.choices[0].message.content)
+        return parse_json_safely(content)
     except:
         return None
 
-def get_sentiment_analysis():
-    results = []
-    print("🚀 커뮤니티 감성 분석 시작...")
+def analyze_stock(stock):
+    """
+    종목 하나를 [수집 → 요약 → 심층 분석] 단계로 처리
+    각 단계는 해당 자원(소스 호스트 / LLM 모델)의 동시 실행 제한을 통과해야 진입
+    반환: 결과 dict (데이터 없음/분석 실패 시 None)
+    """
+    ticker = stock["ticker"]
+    limit = stock["fetch_limit"]
+    timing = {}
+    t0 = time.monotonic()
+
+    # [1단계] 커뮤니티 수집 (소스 호스트별 제한)
+    source = "naver" if ticker.isdigit() else "reddit"
+    with _crawl_slots[source]:
+        t = time.monotonic()
+        if source == "naver":
+            raw_posts = get_naver_posts(ticker, limit)
+        else:
+            raw_posts = get_reddit_posts(ticker, limit)
+        timing["crawl"] = round(time.monotonic() - t, 2)
+        
+    if not raw_posts: 
+        print(f"⚠️ [{stock['name']}] 데이터 없음 (0건).")
+        return None
     
-    for stock in TARGET_STOCKS:
-        try:
-            ticker = stock["ticker"]
-            limit = stock["fetch_limit"]
-            
-            if ticker.isdigit():
-                raw_posts = get_naver_posts(ticker, limit)
-            else:
-                raw_posts = get_reddit_posts(ticker, limit)
-                
-            if not raw_posts: 
-                print(f"⚠️ [{stock['name']}] 데이터 없음 (0건).")
+    # [수정] check_volume_spike에 ticker를 전달하여 히스토리 관리
+    vol_status, velocity = check_volume_spike(stock["name"], raw_posts, stock["avg_velocity"])
+    filtered_count = len(raw_posts)
+    
+    # [2단계] 핵심 의견 요약 (MODEL_FAST 동시 호출 제한은 llm_gateway가 적용)
+    print(f"🤖 [{stock['name']}] 요약 중 ({filtered_count}건)...")
+    t = time.monotonic()
+    key_sentences = summarize_with_llm(stock["name"], raw_posts)
+    timing["summarize"] = round(time.monotonic() - t, 2)
+    if not key_sentences: return None
+    
+    # [3단계] 심층 분석 (MODEL_SMART 동시 호출 제한은 llm_gateway가 적용)
+    print(f"🧠 [{stock['name']}] 심층 분석 중...")
+    t = time.monotonic()
+    final_data = analyze_final_sentiment(stock["name"], key_sentences)
+    timing["analyze"] = round(time.monotonic() - t, 2)
+    
+    if not final_data:
+        return None
+
+    timing["total"] = round(time.monotonic() - t0, 2)
+    final_data["ticker"] = stock["name"]
+    final_data["volume_status"] = vol_status
+    final_data["velocity"] = velocity
+    final_data["filtered_count"] = filtered_count
+    final_data["summary_sentences"] = key_sentences
+    final_data["timing"] = timing
+    print(f"   -> ✅ 완료: {stock['name']} ({timing['total']}초)")
+    return final_data
+
+def iter_sentiment_analysis(stocks=None):
+    """
+    관심 종목들을 단계별 파이프라인으로 동시에 처리하고, 끝나는 순서대로 결과를 내보냄
+    (한 종목이 LLM 분석 중일 때 다른 종목은 수집/요약 단계를 진행)
+    """
+    stocks = TARGET_STOCKS if stocks is None else stocks
+    print("🚀 커뮤니티 감성 분석 시작...")
+    if not stocks:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(PIPELINE_WORKERS, len(stocks)), thread_name_prefix="sentiment") as pool:
+        futures = {pool.submit(analyze_stock, stock): stock for stock in stocks}
+        for future in as_completed(futures):
+            stock = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ [{stock.get('name')}] 오류: {e}")
                 continue
-            
-            # [수정] check_volume_spike에 ticker를 전달하여 히스토리 관리
-            vol_status, velocity = check_volume_spike(stock["name"], raw_posts, stock["avg_velocity"])
-            filtered_count = len(raw_posts)
-            
-            print(f"🤖 [{stock['name']}] 요약 중 ({filtered_count}건)...")
-            key_sentences = summarize_with_llm(stock["name"], raw_posts)
-            if not key_sentences: continue
-            
-            print(f"🧠 [{stock['name']}] 심층 분석 중...")
-            final_data = analyze_final_sentiment(stock["name"], key_sentences)
-            
-            if final_data:
-                final_data["ticker"] = stock["name"]
-                final_data["volume_status"] = vol_status
-                final_data["velocity"] = velocity
-                final_data["filtered_count"] = filtered_count
-                final_data["summary_sentences"] = key_sentences
-                results.append(final_data)
-                print(f"   -> ✅ 완료: {stock['name']}")
-                
-        except Exception as e:
-            print(f"❌ [{stock.get('name')}] 오류: {e}")
-            continue
-            
-    return results
\ No newline at end of file
+            if result:
+                yield result
+
+def get_sentiment_analysis(stocks=None):
+    """전체 결과를 관심 종목 리스트 순서대로 반환 (완료 순서는 스트리밍 엔드포인트에서만 사용)"""
+    stocks = TARGET_STOCKS if stocks is None else stocks
+    position = {stock["name"]: i for i, stock in enumerate(stocks)}
+    results = list(iter_sentiment_analysis(stocks))
+    results.sort(key=lambda r: position[r["ticker"]])
+    return results
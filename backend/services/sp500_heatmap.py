@@ -0,0 +1,230 @@
+# backend/services/sp500_heatmap.py
+
+import hashlib
+import io
+import json
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from services import market_snapshot
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# S&P 500 섹터/시가총액 히트맵을 직접 그림 (원격 스크린샷 대신)
+# - 구성 종목/섹터/시가총액: data/sp500_constituents.json (시가총액 상위 종목, 분기마다 갱신)
+# - 일간 등락률: 로컬 일봉 저장소(price_store) 기준 스냅샷
+# - 레이아웃: squarified treemap (섹터 → 종목 2단계)
+# - 같은 입력 데이터면 다시 그리지 않음 (데이터 해시 캐시)
+CONSTITUENTS_FILE = os.path.join(os.path.dirname(__file__), '../data/sp500_constituents.json')
+
+WIDTH = 1920
+HEIGHT = 1080
+SECTOR_HEADER = 22     # 섹터 이름 띠 높이(px)
+SECTOR_GAP = 3         # 섹터 사이 간격(px)
+CELL_GAP = 1           # 종목 사이 간격(px)
+
+BACKGROUND = (38, 41, 49)
+HEADER_TEXT = (210, 212, 220)
+CELL_TEXT = (255, 255, 255)
+NO_DATA_COLOR = (65, 69, 84)
+
+# 등락률(%) → 색상 (사이 값은 선형 보간, 범위 밖은 양 끝 색)
+COLOR_STOPS = np.array([-3.0, -2.0, -1.0, 0.0, 1.0, 2.0, 3.0])
+COLOR_VALUES = np.array([
+    (246, 53, 56),
+    (191, 64, 69),
+    (139, 68, 78),
+    (65, 69, 84),
+    (53, 118, 78),
+    (47, 158, 79),
+    (48, 204, 90),
+], dtype=float)
+
+# 칸 크기별 글자 크기 (짧은 변 기준, 큰 칸부터 검사)
+FONT_STEPS = ((160, 36), (110, 28), (70, 20), (45, 14), (28, 10))
+
+_lock = threading.Lock()
+_last = None   # {"hash": str, "png": bytes}
+
+# =========================================================
+# 📋 구성 종목
+# =========================================================
+@lru_cache(maxsize=1)
+def _load_constituents(mtime):
+    with open(CONSTITUENTS_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return tuple(
+        (c["symbol"], c["sector"], float(c["market_cap"]))
+        for c in data["constituents"] if c.get("market_cap", 0) > 0
+    )
+
+
+def load_constituents():
+    """[(종목, 섹터, 시가총액), ...] (파일이 바뀐 경우에만 다시 읽음)"""
+    return _load_constituents(os.path.getmtime(CONSTITUENTS_FILE))
+
+# =========================================================
+# 🧮 Squarified treemap
+# =========================================================
+def squarify(sizes, x, y, width, height):
+    """
+    크기 배열(내림차순) → 각 항목의 사각형 [[x, y, w, h], ...]
+    한 줄(row)에 몇 개를 넣을지는 남은 항목 전체의 '최악 가로세로비'를 한 번에 계산해서,
+    비율이 처음으로 나빠지기 직전까지를 한 줄로 확정 (Bruls et al. 방식과 같은 결과)
+    """
+    sizes = np.asarray(sizes, dtype=float)
+    rects = np.zeros((len(sizes), 4))
+    total = sizes.sum()
+    if len(sizes) == 0 or total <= 0 or width <= 0 or height <= 0:
+        return rects
+
+    areas = sizes * (width * height / total)
+    i = 0
+    while i < len(areas):
+        side = min(width, height)
+        rest = areas[i:]
+        sums = np.cumsum(rest)
+        # 앞에서 k+1개를 짧은 변에 붙였을 때의 최악 비율 (rest[0]이 최대, rest[k]가 최소)
+        worst = np.maximum(side * side * rest[0] / (sums * sums), sums * sums / (side * side * rest))
+        grows = np.flatnonzero(np.diff(worst) > 0)
+        k = grows[0] + 1 if len(grows) else len(rest)
+
+        row = rest[:k]
+        thickness = sums[k - 1] / side
+        lengths = row / thickness
+        offsets = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+        if width >= height:
+            # 세로 한 줄 (왼쪽부터 채움)
+            rects[i:i + k] = np.column_stack([np.full(k, x), y + offsets, np.full(k, thickness), lengths])
+            x += thickness
+            width -= thickness
+        else:
+            # 가로 한 줄 (위쪽부터 채움)
+            rects[i:i + k] = np.column_stack([x + offsets, np.full(k, y), lengths, np.full(k, thickness)])
+            y += thickness
+            height -= thickness
+        i += k
+    return rects
+
+
+def layout(constituents, width=WIDTH, height=HEIGHT):
+    """
+    섹터 → 종목 2단계 배치
+    반환: (섹터 리스트 [(이름, 사각형)], 종목 인덱스 배열, 종목 사각형 배열)
+    """
+    sectors = {}
+    for idx, (_, sector, cap) in enumerate(constituents):
+        sectors.setdefault(sector, []).append(idx)
+
+    caps = np.array([cap for _, _, cap in constituents])
+    names = sorted(sectors, key=lambda s: caps[sectors[s]].sum(), reverse=True)
+    sector_rects = squarify([caps[sectors[s]].sum() for s in names], 0, 0, width, height)
+
+    sector_boxes, order, cell_rects = [], [], []
+    for name, (sx, sy, sw, sh) in zip(names, sector_rects):
+        box = (sx + SECTOR_GAP / 2, sy + SECTOR_GAP / 2, sw - SECTOR_GAP, sh - SECTOR_GAP)
+        sector_boxes.append((name, box))
+
+        # 섹터 이름 띠를 넣을 공간이 없으면 생략
+        header = SECTOR_HEADER if box[3] > SECTOR_HEADER * 3 else 0
+        members = np.array(sectors[name])
+        members = members[np.argsort(-caps[members], kind="stable")]
+        order.append(members)
+        cell_rects.append(squarify(caps[members], box[0], box[1] + header, box[2], box[3] - header))
+
+    return sector_boxes, np.concatenate(order), np.vstack(cell_rects)
+
+# =========================================================
+# 🎨 렌더링
+# =========================================================
+def change_colors(change_pct):
+    """등락률 배열 → RGB 배열 (NaN은 회색)"""
+    change_pct = np.asarray(change_pct, dtype=float)
+    colors = np.column_stack([np.interp(change_pct, COLOR_STOPS, COLOR_VALUES[:, ch]) for ch in range(3)])
+    colors[np.isnan(change_pct)] = NO_DATA_COLOR
+    return colors.round().astype(int)
+
+
+@lru_cache(maxsize=None)
+def _font(size):
+    return ImageFont.load_default(size=size)
+
+
+def _font_size(w, h):
+    short = min(w, h)
+    for min_side, size in FONT_STEPS:
+        if short >= min_side and w >= size * 2.5:
+            return size
+    return None
+
+
+def render(constituents, change_pct, width=WIDTH, height=HEIGHT):
+    """구성 종목 + 종목별 등락률(%) → PNG bytes"""
+    sector_boxes, order, rects = layout(constituents, width, height)
+    colors = change_colors(np.asarray(change_pct, dtype=float)[order])
+
+    img = Image.new("RGB", (width, height), BACKGROUND)
+    draw = ImageDraw.Draw(img)
+
+    for name, (sx, sy, sw, sh) in sector_boxes:
+        if sh > SECTOR_HEADER * 3:
+            draw.text((sx + 4, sy + SECTOR_HEADER / 2), name.upper(), font=_font(13), fill=HEADER_TEXT, anchor="lm")
+
+    for idx, (x, y, w, h), color in zip(order, rects, colors):
+        x0, y0 = round(x + CELL_GAP / 2), round(y + CELL_GAP / 2)
+        x1, y1 = round(x + w - CELL_GAP / 2) - 1, round(y + h - CELL_GAP / 2) - 1
+        if x1 < x0 or y1 < y0:
+            continue
+        draw.rectangle((x0, y0, x1, y1), fill=tuple(color))
+
+        size = _font_size(w, h)
+        if size is None:
+            continue
+        cx, cy = x + w / 2, y + h / 2
+        pct = change_pct[idx]
+        if h >= size * 2.6 and not np.isnan(pct):
+            draw.text((cx, cy), constituents[idx][0], font=_font(size), fill=CELL_TEXT, anchor="md")
+            draw.text((cx, cy + 2), f"{pct:+.2f}%", font=_font(max(size * 2 // 3, 9)), fill=CELL_TEXT, anchor="ma")
+        else:
+            draw.text((cx, cy), constituents[idx][0], font=_font(size), fill=CELL_TEXT, anchor="mm")
+
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", optimize=False)
+    return buf.getvalue()
+
+
+def data_hash(constituents, change_pct, width=WIDTH, height=HEIGHT):
+    """그림을 결정하는 입력(구성/시가총액/등락률 소수 둘째 자리/크기)의 해시"""
+    rounded = [None if np.isnan(p) else round(float(p), 2) for p in change_pct]
+    payload = json.dumps([constituents, rounded, width, height], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_heatmap(sync=True):
+    """
+    최신 히트맵 PNG bytes (입력 데이터가 이전과 같으면 이전 그림 재사용)
+    등락률을 하나도 구하지 못하면 None
+    """
+    global _last
+    constituents = load_constituents()
+    symbols = [symbol for symbol, _, _ in constituents]
+    snapshot = market_snapshot.get_snapshot_from_store(symbols, sync=sync)
+    change_pct = snapshot["change_pct"].reindex(symbols).to_numpy(dtype=float)
+    if np.isnan(change_pct).all():
+        print("   ⚠️ [S&P Map] 등락률 데이터 없음")
+        return None
+
+    key = data_hash(constituents, change_pct)
+    with _lock:
+        if _last is not None and _last["hash"] == key:
+            return _last["png"]
+
+    png = render(constituents, change_pct)
+    with _lock:
+        _last = {"hash": key, "png": png}
+    return png
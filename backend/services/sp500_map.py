@@ -0,0 +1,302 @@
+# backend/services/sp500_map.py
+
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from dotenv import load_dotenv
+from PIL import Image
+
+from services import http_client, sp500_heatmap
+
+# CAPTURE_TTL / PUBLIC_BASE_URL 을 모듈 로드 시점에 읽으므로 .env 먼저 로드
+load_dotenv()
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# S&P 500 히트맵 원본(로컬 렌더링 또는 ApiFlash 캡처) → 캐시 → 용도별 축소/재압축 이미지
+# - local: sp500_heatmap이 로컬 일봉 데이터로 직접 그림 (기본값, 외부 API 키 불필요)
+# - apiflash: finviz 지도 원격 스크린샷 (느리고 유료 호출)
+# - 원본은 CAPTURE_TTL 동안 재사용 (요청마다 다시 만들지 않음)
+# - 이메일에는 수 MB짜리 PNG 대신 폭을 줄인 JPEG/WebP 사용
+# - 변환 결과는 내용 해시 파일명으로 저장 → 변하지 않는 URL로 제공 가능
+APIFLASH_URL = "https://api.apiflash.com/v1/urltoimage"
+MAP_URL = "https://finviz.com/map.ashx?t=sec"
+DEFAULT_MAP_SOURCE = "local"   # SP500_MAP_SOURCE: local | apiflash
+IMAGE_DIR = "sp500_map_cache"
+CAPTURE_FILE = "capture.png"
+CAPTURE_META = "capture.json"
+CAPTURE_TTL = int(os.getenv("SP500_MAP_TTL", 15 * 60))   # 캡처 재사용 시간(초)
+STALE_MAX_AGE = 6 * 60 * 60      # 새 캡처 실패 시 이전 캡처를 대신 쓸 수 있는 최대 나이(초)
+KEEP_VARIANT_FILES = 12          # 디스크에 남겨둘 변환 파일 수 (오래된 것부터 삭제)
+
+# 용도별 목표 폭(px) - 이메일 본문 폭 600px의 2배(레티나)
+VARIANTS = {
+    "email": 1200,
+    "full": 1920,
+}
+FORMATS = {
+    "jpeg": {"ext": "jpg", "content_type": "image/jpeg", "save": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}},
+    "webp": {"ext": "webp", "content_type": "image/webp", "save": {"format": "WEBP", "quality": 80, "method": 4}},
+}
+DEFAULT_VARIANT = "email"
+DEFAULT_FORMAT = "jpeg"   # 이메일 클라이언트 호환성 (Outlook 등은 WebP 미지원)
+
+# 이메일 HTML에 절대 URL로 넣을 때 사용할 서버 주소 (없으면 이메일에는 base64로 첨부)
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
+IMAGE_ROUTE = "/report/sp500-map/images"
+
+# _lock은 캐시 조회/저장에만 사용 (캡처/변환 중에는 잡지 않음)
+# 같은 캡처/변환 요청이 겹치면 먼저 온 호출자만 실행하고 나머지는 그 Future 결과를 공유
+_lock = threading.Lock()
+_capture = None          # {"data": bytes, "captured_at": epoch, "hash": str}
+_capture_inflight = None # 진행 중인 캡처 Future
+_variants = {}           # (capture_hash, variant, fmt) -> {"data", "digest", "filename", "content_type", "width", "height"}
+_variant_inflight = {}   # (capture_hash, variant, fmt) -> 진행 중인 변환 Future
+
+# =========================================================
+# 📸 캡처
+# =========================================================
+def _capture_from_apiflash():
+    access_key = os.getenv("APIFLASH_ACCESS_KEY")
+    if not access_key:
+        return None
+
+    params = {
+        "access_key": access_key,
+        "url": MAP_URL,
+        "element": "#canvas-wrapper",
+        "response_type": "image",
+        "format": "png",
+        "quality": 100,
+        "width": 1920,
+        "height": 1080,
+        "wait_until": "page_loaded"
+    }
+    # 캡처 렌더링에 시간이 걸리므로 타임아웃을 넉넉하게
+    response = http_client.get(APIFLASH_URL, params=params, timeout=60)
+    response.raise_for_status()
+    return response.content
+
+
+def _map_source():
+    return os.getenv("SP500_MAP_SOURCE", DEFAULT_MAP_SOURCE)
+
+
+def _capture_image():
+    if _map_source() == "apiflash":
+        return _capture_from_apiflash()
+    return sp500_heatmap.get_heatmap()
+
+
+def _load_capture_from_disk():
+    try:
+        with open(os.path.join(IMAGE_DIR, CAPTURE_META), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(IMAGE_DIR, CAPTURE_FILE), "rb") as f:
+            data = f.read()
+    except (OSError, ValueError):
+        return None
+    if hashlib.sha256(data).hexdigest() != meta.get("hash"):
+        return None
+    return {"data": data, "captured_at": meta["captured_at"], "hash": meta["hash"]}
+
+
+def _save_capture_to_disk(capture):
+    os.makedirs(IMAGE_DIR, exist_ok=True)
+    _atomic_write(os.path.join(IMAGE_DIR, CAPTURE_FILE), capture["data"])
+    meta = {"captured_at": capture["captured_at"], "hash": capture["hash"]}
+    _atomic_write(os.path.join(IMAGE_DIR, CAPTURE_META), json.dumps(meta).encode("utf-8"))
+
+
+def _atomic_write(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def get_capture(force=False):
+    """
+    최신 캡처 (CAPTURE_TTL 안이면 메모리/디스크 캐시 사용)
+    새 캡처가 실패하면 STALE_MAX_AGE 이내의 이전 캡처로 대체, 그것도 없으면 None
+    다른 요청이 이미 캡처 중이면: 쓸 수 있는 이전 캡처가 있으면 바로 반환, 없으면 그 결과를 기다림
+    """
+    global _capture, _capture_inflight
+    with _lock:
+        if _capture is None:
+            _capture = _load_capture_from_disk()
+
+        now = time.time()
+        if _capture and not force and now - _capture["captured_at"] < CAPTURE_TTL:
+            return _capture
+
+        future = _capture_inflight
+        owner = future is None
+        if owner:
+            future = _capture_inflight = Future()
+        elif _capture and now - _capture["captured_at"] < STALE_MAX_AGE:
+            return _capture
+
+    if not owner:
+        return future.result()
+
+    try:
+        result = _refresh_capture(now)
+        future.set_result(result)
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _capture_inflight = None
+    return result
+
+
+def _refresh_capture(now):
+    """새 캡처 (락 밖에서 실행), 실패 시 STALE_MAX_AGE 이내의 이전 캡처 또는 None"""
+    global _capture
+    try:
+        data = _capture_image()
+    except Exception as e:
+        print(f"S&P Map Error ({_map_source()}): {e}")
+        data = None
+
+    if data:
+        capture = {"data": data, "captured_at": now, "hash": hashlib.sha256(data).hexdigest()}
+        _save_capture_to_disk(capture)
+        with _lock:
+            _capture = capture
+        return capture
+
+    with _lock:
+        previous = _capture
+    if previous and now - previous["captured_at"] < STALE_MAX_AGE:
+        print(f"   ♻️ [S&P Map] 이전 캡처 사용 ({int(now - previous['captured_at'])}초 전)")
+        return previous
+    return None
+
+# =========================================================
+# 🖼️ 변환 (축소 + 재압축)
+# =========================================================
+def get_variant(variant=DEFAULT_VARIANT, fmt=DEFAULT_FORMAT):
+    """
+    용도별 이미지 (캡처당 한 번만 변환)
+    반환: {"data", "digest", "filename", "content_type", "width", "height"} / 캡처 실패 시 None
+    """
+    if variant not in VARIANTS:
+        raise ValueError(f"variant must be one of {list(VARIANTS)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {list(FORMATS)}")
+
+    capture = get_capture()
+    if capture is None:
+        return None
+
+    key = (capture["hash"], variant, fmt)
+    with _lock:
+        cached = _variants.get(key)
+        if cached is not None:
+            return cached
+        future = _variant_inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _variant_inflight[key] = Future()
+
+    if not owner:
+        return future.result()
+
+    try:
+        result = _render_variant(capture["data"], VARIANTS[variant], FORMATS[fmt])
+        _store_variant_file(result)
+        with _lock:
+            # 이전 캡처의 변환 결과는 메모리에서 정리
+            for old in [k for k in _variants if k[0] != capture["hash"]]:
+                del _variants[old]
+            _variants[key] = result
+        future.set_result(result)
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _variant_inflight.pop(key, None)
+    return result
+
+
+def _render_variant(data, width, spec):
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert("RGB")   # JPEG은 알파 채널 미지원
+        if img.width > width:
+            height = round(img.height * width / img.width)
+            img = img.resize((width, height), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, **spec["save"])
+        size = img.size
+
+    out = buf.getvalue()
+    digest = hashlib.sha256(out).hexdigest()[:16]
+    return {
+        "data": out,
+        "digest": digest,
+        "filename": f"{digest}.{spec['ext']}",
+        "content_type": spec["content_type"],
+        "width": size[0],
+        "height": size[1],
+    }
+
+
+def _store_variant_file(result):
+    """해시 파일명으로 저장 (같은 이름이면 내용도 같으므로 덮어쓰지 않음), 오래된 파일 정리"""
+    os.makedirs(IMAGE_DIR, exist_ok=True)
+    path = os.path.join(IMAGE_DIR, result["filename"])
+    if not os.path.exists(path):
+        _atomic_write(path, result["data"])
+
+    exts = tuple("." + spec["ext"] for spec in FORMATS.values())
+    files = [os.path.join(IMAGE_DIR, name) for name in os.listdir(IMAGE_DIR) if name.endswith(exts)]
+    files.sort(key=os.path.getmtime, reverse=True)
+    for old in files[KEEP_VARIANT_FILES:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+
+def read_variant_file(filename):
+    """해시 URL 요청 처리용 (파일명 검증 후 (bytes, content_type), 없으면 None)"""
+    digest, _, ext = filename.partition(".")
+    spec = next((s for s in FORMATS.values() if s["ext"] == ext), None)
+    if spec is None or len(digest) != 16 or not all(c in "0123456789abcdef" for c in digest):
+        return None
+    try:
+        with open(os.path.join(IMAGE_DIR, filename), "rb") as f:
+            return f.read(), spec["content_type"]
+    except OSError:
+        return None
+
+# =========================================================
+# 🔗 이메일/응답용
+# =========================================================
+def image_path(result):
+    return f"{IMAGE_ROUTE}/{result['filename']}"
+
+
+def get_email_image_src():
+    """
+    이메일 <img src> 값
+    PUBLIC_BASE_URL이 있으면 해시 URL, 없으면 축소 JPEG의 data URI (원본 PNG base64보다 훨씬 작음)
+    캡처 실패 시 None
+    """
+    result = get_variant(DEFAULT_VARIANT, DEFAULT_FORMAT)
+    if result is None:
+        return None
+    if PUBLIC_BASE_URL:
+        return PUBLIC_BASE_URL + image_path(result)
+    return f"data:{result['content_type']};base64," + base64.b64encode(result["data"]).decode("ascii")
@@ -1,15 +1,14 @@
-import feedparser
-import re
 import os
+import re
 import json
 from html import unescape
 from datetime import datetime, timedelta
 from dateutil import parser as date_parser
-from difflib import SequenceMatcher
 import pytz
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from services import dedup, feed_fetcher, llm_cache
+
 load_dotenv()
 
 # =========================================================
@@ -58,10 +57,6 @@ def clean_html(raw_html):
     cleantext = re.sub(cleanr, '', raw_html)
     return unescape(cleantext).strip()
 
-def is_similar(a, b, threshold=0.5):
-    """제목 유사도 검사"""
-    return SequenceMatcher(None, a, b).ratio() > threshold
-
 def is_paywalled(source_name):
     if not source_name: return False
     source_lower = source_name.lower()
@@ -93,9 +88,13 @@ def get_google_news_rss(query, lang="en", limit=2):
         rss_url = f"https://news.google.com/rss/search?q={query}+when:24h&hl=en-US&gl=US&ceid=US:en"
 
     try:
-        feed = feedparser.parse(rss_url)
+        feed = feed_fetcher.fetch(rss_url)
+        if feed is None:
+            print(f"RSS Error ({query}): 응답 오류")
+            return []
         news_results = []
-        seen_titles = [] 
+        # 제목 유사 중복 검사 (이번 실행 + 지난 실행에서 이미 보낸 제목)
+        deduper = dedup.HeadlineDeduper(f"stock:{query}")
         
         # 시간 필터 설정
         kst_tz = pytz.timezone('Asia/Seoul')
@@ -112,7 +111,7 @@ def get_google_news_rss(query, lang="en", limit=2):
             if len(news_results) >= limit:
                 break
                 
-            if len(seen_titles) >= fetch_count * 2:
+            if stats["accepted"] >= fetch_count * 2:
                 break
 
             # ---------------------------------------------------------
@@ -141,19 +140,12 @@ def get_google_news_rss(query, lang="en", limit=2):
 
             # [필터 3] 중복 제거
             title = entry.title
-            is_dup = False
-            for seen in seen_titles:
-                if is_similar(title, seen):
-                    is_dup = True
-                    break
-            
-            if is_dup:
+            if deduper.check_and_add(title):
                 stats["dropped_dup"] += 1
                 # print(f"      👯 [Skip:중복] {title[:20]}...")
                 continue 
             
             # -- 통과 --
-            seen_titles.append(title)
             stats["accepted"] += 1
             
             pub_date_fmt = article_dt_kst.strftime("%Y-%m-%d %H:%M")
@@ -165,6 +157,8 @@ def get_google_news_rss(query, lang="en", limit=2):
                 "source": source_name or "Google News"
             })
             
+        deduper.commit()
+
         # [최종 로그 출력] 왜 0개가 나왔는지 확인 가능
         if stats["accepted"] == 0:
             print(f"   ⚠️ [Result] '{query}' 수집 0건! (원인: 시간탈락 {stats['dropped_time']}건, 유료탈락 {stats['dropped_paywall']}건, 중복탈락 {stats['dropped_dup']}건)")
@@ -175,80 +169,162 @@ def get_google_news_rss(query, lang="en", limit=2):
         print(f"RSS Error ({query}): {e}")
         return []
 
-def analyze_news_sentiment(stock_name, news_list):
+# =========================================================
+# ▼▼▼ [설정] AI 분석 모드 ▼▼▼
+# =========================================================
+# "sequential": 종목마다 LLM 1회 호출 / "batched": 여러 종목 헤드라인을 묶어 한 번에 호출
+# 두 모드 모두 같은 프롬프트·ID 형식을 사용하므로 결과 매핑 방식이 동일
+# 기본값은 기존 동작(sequential), 환경변수 STOCK_NEWS_ANALYSIS_MODE 또는 호출 시 mode 인자로 변경
+ANALYSIS_MODES = ("sequential", "batched")
+ANALYSIS_MODE = "sequential"
+BATCH_TOKEN_BUDGET = 1500   # 요청 1건에 담을 헤드라인 입력 토큰 상한 (대략치)
+CHARS_PER_TOKEN = 3         # 토큰 수 추정용 (영문/한글 혼합 기준 보수적으로)
+
+NEWS_ANALYSIS_PROMPT = """
+You are a professional Stock News Analyst.
+Analyze the provided news headlines. Each line starts with an ID in brackets, followed by the stock it belongs to.
+
+Tasks:
+1. **Sentiment**: Tag as '🟢 호재' (Good), '🔴 악재' (Bad), or '⚪ 중립' (Neutral).
+2. **Importance**: Score from 1 (Trivial) to 5 (Critical Market Mover).
+3. **Keywords**: Identify 1-2 key words in the title and wrap them with markdown bold (**word**).
+4. **Translate**: If the title is in English, translate it to Korean naturally.
+
+Return one object per headline and copy its ID exactly.
+Output format must be a JSON list of objects:
+[
+    {
+        "id": "TSLA-1",
+        "sentiment": "🟢 호재",
+        "importance": 4,
+        "processed_title": "Tesla **Earnings** beat expectations...",
+        "korean_title": "테슬라 **실적** 예상치 상회..."
+    }
+]
+"""
+
+def build_news_items(ticker, stock_name, news_list):
+    """헤드라인마다 고정 ID(예: TSLA-1) 부여 → 응답 순서와 무관하게 종목/기사에 매핑"""
+    return [
+        {
+            "id": f"{ticker}-{i+1}",
+            "line": f"[{ticker}-{i+1}] Stock: {stock_name} | Source: {news['source']} | Title: {news['title']}",
+            "news": news
+        }
+        for i, news in enumerate(news_list)
+    ]
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def pack_batches(items, budget=BATCH_TOKEN_BUDGET):
+    """입력 토큰 추정치가 budget을 넘지 않도록 순서대로 묶음 (한 줄이 budget보다 커도 단독 배치로 처리)"""
+    batches, current, used = [], [], 0
+    for item in items:
+        cost = estimate_tokens(item["line"])
+        if current and used + cost > budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def request_news_analysis(items):
     """
-    AI를 이용한 태깅, 중요도 평가, 키워드 볼드 처리
+    헤드라인 묶음을 LLM 1회 호출로 분석
+    반환: {id: ai_data} (응답에 빠진 ID는 포함되지 않음)
     """
-    if not news_list:
-        return []
+    if not items:
+        return {}
 
-    api_key = os.getenv("UPSTAGE_API_KEY")
-    client = OpenAI(api_key=api_key, base_url="https://api.upstage.ai/v1/solar")
-
-    news_context = ""
-    for i, news in enumerate(news_list):
-        news_context += f"[{i+1}] Source: {news['source']} | Title: {news['title']}\n"
-
-    system_prompt = f"""
-    You are a professional Stock News Analyst for '{stock_name}'.
-    Analyze the provided news headlines.
-
-    Tasks:
-    1. **Sentiment**: Tag as '🟢 호재' (Good), '🔴 악재' (Bad), or '⚪ 중립' (Neutral).
-    2. **Importance**: Score from 1 (Trivial) to 5 (Critical Market Mover).
-    3. **Keywords**: Identify 1-2 key words in the title and wrap them with markdown bold (**word**).
-    4. **Translate**: If the title is in English, translate it to Korean naturally.
-
-    Output format must be a JSON list of objects:
-    [
-        {{
-            "sentiment": "🟢 호재",
-            "importance": 4,
-            "processed_title": "Tesla **Earnings** beat expectations...",
-            "korean_title": "테슬라 **실적** 예상치 상회..." 
-        }}
-    ]
+    news_context = "\n".join(item["line"] for item in items) + "\n"
+
+    content = llm_cache.chat(
+        model="solar-1-mini-chat",
+        messages=[
+            {"role": "system", "content": NEWS_ANALYSIS_PROMPT},
+            {"role": "user", "content": news_context}
+        ],
+        temperature=0.1,
+        validate=llm_cache.is_json
+    )
+
+    cleaned = content.replace("```json", "").replace("```", "").strip()
+    analysis_result = json.loads(cleaned)
+
+    valid_ids = {item["id"] for item in items}
+    return {
+        str(ai_data.get("id")).strip(): ai_data
+        for ai_data in analysis_result
+        if isinstance(ai_data, dict) and str(ai_data.get("id")).strip() in valid_ids
+    }
+
+def apply_news_analysis(items, analyses):
+    """ID로 찾은 분석 결과를 기사에 반영 (결과가 없으면 중립 처리)"""
+    for item in items:
+        news = item["news"]
+        ai_data = analyses.get(item["id"])
+        if ai_data is None:
+            news["sentiment"] = "⚪ 중립"
+            news["display_title"] = news["title"]
+            continue
+
+        news["sentiment"] = ai_data.get("sentiment", "⚪ 중립")
+        news["importance"] = ai_data.get("importance", 1)
+        if news.get("title") != ai_data.get("korean_title"):
+            news["display_title"] = ai_data.get("korean_title", news["title"])
+        else:
+            news["display_title"] = ai_data.get("processed_title", news["title"])
+
+def analyze_news_sentiment(stock_name, news_list, ticker=None):
+    """
+    AI를 이용한 태깅, 중요도 평가, 키워드 볼드 처리 (종목 1개 = LLM 1회)
     """
+    if not news_list:
+        return []
 
+    items = build_news_items(ticker or stock_name, stock_name, news_list)
     try:
-        response = client.chat.completions.create(
-            model="solar-1-mini-chat",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": news_context}
-            ],
-            temperature=0.1
-        )
-        
-        content = response.choices[0].message.content
-        cleaned = content.replace("```json", "").replace("```", "").strip()
-        analysis_result = json.loads(cleaned)
-        
-        for i, item in enumerate(news_list):
-            if i < len(analysis_result):
-                ai_data = analysis_result[i]
-                item["sentiment"] = ai_data.get("sentiment", "⚪ 중립")
-                item["importance"] = ai_data.get("importance", 1)
-                
-                if item.get("title") != ai_data.get("korean_title"):
-                     item["display_title"] = ai_data.get("korean_title", item["title"])
-                else:
-                     item["display_title"] = ai_data.get("processed_title", item["title"])
-            else:
-                item["sentiment"] = "⚪ 중립"
-                item["display_title"] = item["title"]
-                
-        return news_list
-
+        analyses = request_news_analysis(items)
     except Exception as e:
         print(f"AI Analysis Error: {e}")
         return news_list
 
-def get_interested_stock_news():
+    apply_news_analysis(items, analyses)
+    return news_list
+
+def analyze_news_batched(stock_news, budget=BATCH_TOKEN_BUDGET):
+    """
+    여러 종목의 헤드라인을 토큰 예산 안에서 묶어 분석 (N개 종목 → 1~몇 회 호출)
+    stock_news: [(ticker, stock_name, news_list), ...]
+    실패한 배치에 속한 기사만 원본 그대로 남음 (sequential 모드의 종목 단위 실패와 동일한 처리)
+    """
+    items = []
+    for ticker, stock_name, news_list in stock_news:
+        items.extend(build_news_items(ticker, stock_name, news_list))
+
+    batches = pack_batches(items, budget)
+    print(f"   🧺 [Batch] 헤드라인 {len(items)}건 → LLM 요청 {len(batches)}회")
+    for batch in batches:
+        try:
+            analyses = request_news_analysis(batch)
+        except Exception as e:
+            print(f"AI Analysis Error: {e}")
+            continue
+        apply_news_analysis(batch, analyses)
+
+def get_interested_stock_news(mode=None):
     """
     메인 실행 함수
+    mode: "sequential" | "batched" (없으면 STOCK_NEWS_ANALYSIS_MODE 환경변수, 그것도 없으면 ANALYSIS_MODE)
     """
-    print("📰 관심 종목 뉴스 수집 및 AI 분석 시작...")
+    mode = mode or os.getenv("STOCK_NEWS_ANALYSIS_MODE", ANALYSIS_MODE)
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"mode must be one of {ANALYSIS_MODES}, got {mode!r}")
+
+    print(f"📰 관심 종목 뉴스 수집 및 AI 분석 시작... (mode: {mode})")
     results = []
 
     for stock in TARGET_STOCKS:
@@ -262,19 +338,18 @@ def get_interested_stock_news():
         # 1. 뉴스 수집
         raw_news = get_google_news_rss(name, lang, limit)
         
-        # 2. AI 분석
-        if raw_news:
-            analyzed_news = analyze_news_sentiment(name, raw_news)
-            results.append({
-                "ticker": ticker,
-                "name": name,
-                "news": analyzed_news
-            })
-        else:
-             results.append({
-                "ticker": ticker,
-                "name": name,
-                "news": [] 
-            })
+        # 2. AI 분석 (sequential 모드만 여기서 종목별 호출)
+        if raw_news and mode == "sequential":
+            raw_news = analyze_news_sentiment(name, raw_news, ticker)
+
+        results.append({
+            "ticker": ticker,
+            "name": name,
+            "news": raw_news
+        })
+
+    # 2. AI 분석 (batched 모드: 모든 종목 헤드라인을 모아서 호출)
+    if mode == "batched":
+        analyze_news_batched([(r["ticker"], r["name"], r["news"]) for r in results if r["news"]])
     
-    return results
\ No newline at end of file
+    return results
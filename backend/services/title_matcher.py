@@ -0,0 +1,91 @@
+# backend/services/title_matcher.py
+
+import re
+from collections import deque
+
+# =========================================================
+# 🔤 다중 패턴 제목 매칭 (Aho–Corasick)
+# =========================================================
+# 지표 제목(패턴)들로 오토마톤을 한 번 만들어 두면
+# 캘린더 일정 제목을 한 번씩만 훑어서 모든 지표의 부분 일치를 동시에 찾음
+# → 패턴 수가 수백 개로 늘어도 (일정 수 × 패턴 수) 비교가 생기지 않음
+
+def normalize(text):
+    """소문자 + 연속 공백 하나로 (제목/패턴 모두 같은 규칙)"""
+    return re.sub(r"\s+", " ", (text or "").lower()).strip()
+
+
+class TitleMatcher:
+    """
+    patterns: 찾을 제목 목록 (예: INDICATOR_MAP 의 ff_title)
+    match_all(items) → {pattern: item}
+    - 제목이 패턴과 정확히 같은 일정을 우선
+    - 없으면 패턴을 포함하는 일정 중 가장 앞선 일정 (기존 next(...) 부분 일치와 동일)
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(dict.fromkeys(p for p in patterns if normalize(p)))
+        self.normalized = [normalize(p) for p in self.patterns]
+        self._build()
+
+    def _build(self):
+        # 노드: goto(문자 → 노드), fail 링크, 이 노드에서 끝나는 패턴 인덱스
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for idx, pattern in enumerate(self.normalized):
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = nxt
+            self.output[node].append(idx)
+
+        # BFS로 fail 링크 계산, fail 노드의 출력도 합쳐둠
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def find(self, text):
+        """text(정규화된 문자열)에 포함된 패턴 인덱스 집합"""
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            if self.output[node]:
+                found.update(self.output[node])
+        return found
+
+    def match_all(self, items, key=lambda item: item["title"]):
+        """일정 목록을 한 번 훑어서 패턴별 매칭 일정 반환 (매칭 없는 패턴은 포함 안 됨)"""
+        exact = {}
+        contains = {}
+        for item in items:
+            title = normalize(key(item))
+            for idx in self.find(title):
+                if self.normalized[idx] == title:
+                    exact.setdefault(idx, item)
+                else:
+                    contains.setdefault(idx, item)
+
+        result = {}
+        for idx, pattern in enumerate(self.patterns):
+            item = exact.get(idx, contains.get(idx))
+            if item is not None:
+                result[pattern] = item
+        return result
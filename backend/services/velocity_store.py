@@ -0,0 +1,128 @@
+# backend/services/velocity_store.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# 커뮤니티 글 리젠 속도 기록 (기존 velocity_history.json 대체)
+# - 종목+날짜 단위 UPSERT → 한 종목 갱신이 다른 종목 데이터를 다시 쓰지 않음
+# - SQLite 트랜잭션으로 여러 워커가 동시에 써도 파일이 깨지지 않음
+DB_PATH = "velocity_history.db"
+LEGACY_JSON = "velocity_history.json"   # 최초 1회 가져오기(마이그레이션)
+KEEP_DAYS = 60       # 종목별 보관 기록 수
+AVG_WINDOW = 14      # 동적 평균 계산 기간 (최근 2주)
+AVG_CACHE_TTL = 60   # 다른 워커 프로세스의 갱신을 반영하기 위한 캐시 유효시간(초)
+
+_conn = None
+_lock = threading.Lock()
+_avg_cache = {}      # (ticker, window) -> (count, avg, cached_at) / 갱신 시 무효화
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=10)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS velocity_history (
+                ticker TEXT,
+                date TEXT,
+                velocity REAL,
+                PRIMARY KEY (ticker, date)
+            ) WITHOUT ROWID
+        ''')
+        _conn.commit()
+        _import_legacy_json(_conn)
+    return _conn
+
+
+def _import_legacy_json(conn):
+    """기존 JSON 기록이 있고 DB가 비어 있으면 한 번만 옮겨 담음"""
+    if not os.path.exists(LEGACY_JSON):
+        return
+    if conn.execute("SELECT 1 FROM velocity_history LIMIT 1").fetchone():
+        return
+    try:
+        with open(LEGACY_JSON, "r", encoding="utf-8") as f:
+            history = json.load(f)
+    except Exception as e:
+        print(f"⚠️ Velocity JSON Import Error: {e}")
+        return
+
+    rows = []
+    for ticker, records in history.items():
+        for r in records:
+            # 날짜 없는 옛날 숫자 기록은 순서를 알 수 없어 제외
+            if isinstance(r, dict) and 'velocity' in r and r.get('date'):
+                rows.append((ticker, r['date'], float(r['velocity'])))
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO velocity_history (ticker, date, velocity) VALUES (?, ?, ?)", rows)
+    print(f"   🗄️ [Velocity] JSON 기록 {len(rows)}건 가져오기 완료")
+
+# =========================================================
+# 📖 조회
+# =========================================================
+def get_history(ticker, limit=KEEP_DAYS):
+    """종목 기록 (날짜 오름차순) [{'date': ..., 'velocity': ...}, ...]"""
+    with _lock:
+        rows = _get_conn().execute(
+            "SELECT date, velocity FROM velocity_history WHERE ticker = ? ORDER BY date DESC LIMIT ?",
+            (ticker, limit)
+        ).fetchall()
+    return [{"date": d, "velocity": v} for d, v in reversed(rows)]
+
+
+def get_avg_velocity(ticker, default_val, window=AVG_WINDOW):
+    """
+    최근 window개 기록 평균 (기록 없으면 default_val)
+    인덱스 범위 조회 한 번 + 프로세스 내 캐시 (갱신 시 무효화)
+    """
+    cached = _avg_cache.get((ticker, window))
+    if cached is None or time.monotonic() - cached[2] > AVG_CACHE_TTL:
+        with _lock:
+            count, avg = _get_conn().execute('''
+                SELECT COUNT(*), AVG(velocity) FROM (
+                    SELECT velocity FROM velocity_history WHERE ticker = ? ORDER BY date DESC LIMIT ?
+                )
+            ''', (ticker, window)).fetchone()
+        cached = (count, avg, time.monotonic())
+        _avg_cache[(ticker, window)] = cached
+
+    count, avg, _ = cached
+    return avg if count else default_val
+
+# =========================================================
+# ✍️ 갱신
+# =========================================================
+def record_velocity(ticker, current_velocity, date_str=None):
+    """
+    오늘 날짜 기록이 있으면 덮어쓰고, 없으면 추가 (한 트랜잭션)
+    KEEP_DAYS를 넘는 오래된 기록은 같은 트랜잭션에서 정리
+    """
+    if current_velocity <= 0: return
+
+    date_str = date_str or datetime.now().strftime("%Y-%m-%d")
+    with _lock:
+        conn = _get_conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO velocity_history (ticker, date, velocity) VALUES (?, ?, ?)",
+                (ticker, date_str, float(current_velocity))
+            )
+            conn.execute('''
+                DELETE FROM velocity_history
+                WHERE ticker = ? AND date < (
+                    SELECT MIN(date) FROM (
+                        SELECT date FROM velocity_history WHERE ticker = ? ORDER BY date DESC LIMIT ?
+                    )
+                )
+            ''', (ticker, ticker, KEEP_DAYS))
+        for key in [k for k in _avg_cache if k[0] == ticker]:
+            del _avg_cache[key]
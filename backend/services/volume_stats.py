@@ -0,0 +1,141 @@
+# backend/services/volume_stats.py
+
+import math
+
+import numpy as np
+
+from services import price_store
+from services.whale_repository import get_repository
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+# 종목별 거래량 기준선(평균/표준편차)을 Welford 상태로 유지 → Z-score는 행 하나 조회로 끝
+# 상태는 whale_tracker.db의 volume_stats 테이블 (whale_repository 공용 연결로 읽고 씀)
+# 기준선 = '가장 최근 봉을 제외한' 최근 WINDOW개 거래일 (기존 hist[:-1] 로직과 동일)
+WINDOW = 252          # 약 1년 거래일
+MIN_SAMPLES = 19      # 기준선 최소 표본 수 (1년치 중 20봉 미만이면 Z-score 0 처리하던 기존 기준)
+
+
+# =========================================================
+# 🔄 상태 갱신
+# =========================================================
+def refresh(tickers, sync=True):
+    """
+    일봉 저장소를 동기화한 뒤, 새로 들어온 봉만큼 기준선 상태를 증분 갱신
+    (봉 하나 추가/제거 = 상수 시간)
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if sync:
+        price_store.sync(tickers)
+
+    states = _load_states(tickers)
+    updates = []
+    for ticker in tickers:
+        state = states.get(ticker)
+        if state is None or state["window"] != WINDOW:
+            new_state = _rebuild_state(ticker)
+        else:
+            new_state = _advance_state(ticker, state)
+        if new_state is not None:
+            updates.append(new_state)
+
+    get_repository().save_volume_states(updates)
+
+
+def rebuild(ticker):
+    """저장소 전체 기준으로 상태를 다시 계산 (과거 봉이 수정된 경우 등)"""
+    state = _rebuild_state(ticker)
+    if state is not None:
+        get_repository().save_volume_states([state])
+    return state
+
+
+def _rebuild_state(ticker):
+    bars = price_store.read_bars(ticker, fields=("volume",), limit=WINDOW + 1)
+    dates, volumes = bars["date"][:-1], bars["volume"][:-1]
+    mask = ~np.isnan(volumes)
+    dates, volumes = dates[mask], volumes[mask]
+    if len(volumes) == 0:
+        return None
+
+    n = len(volumes)
+    mean = float(volumes.mean())
+    m2 = float(((volumes - mean) ** 2).sum())
+    return {
+        "ticker": ticker, "window": WINDOW, "n": n, "mean": mean, "m2": m2,
+        "baseline_start": str(dates[0]), "baseline_end": str(dates[-1])
+    }
+
+
+def _advance_state(ticker, state):
+    """baseline_end 이후 새로 '확정된' 봉(최신 봉 제외)을 추가하고, 창을 넘친 만큼 오래된 봉을 제거"""
+    bars = price_store.read_bars_from(ticker, state["baseline_end"], inclusive=False)
+    # 가장 최근 봉은 '오늘' 값이므로 기준선에서 제외
+    dates, volumes = bars["date"][:-1], bars["volume"][:-1]
+    mask = ~np.isnan(volumes)
+    dates, volumes = dates[mask], volumes[mask]
+    if len(volumes) == 0:
+        return None
+
+    n, mean, m2 = state["n"], state["mean"], state["m2"]
+    for x in volumes.tolist():
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+
+    baseline_start = state["baseline_start"]
+    overflow = n - WINDOW
+    if overflow > 0:
+        old = price_store.read_bars_from(ticker, baseline_start, limit=overflow + 1)
+        old_dates = old["date"][~np.isnan(old["volume"])]
+        old_volumes = old["volume"][~np.isnan(old["volume"])]
+        for x in old_volumes[:overflow].tolist():
+            n -= 1
+            delta = x - mean
+            mean -= delta / n
+            m2 -= delta * (x - mean)
+        baseline_start = str(old_dates[overflow]) if len(old_dates) > overflow else str(dates[0])
+
+    return {
+        "ticker": ticker, "window": WINDOW, "n": n, "mean": mean, "m2": max(m2, 0.0),
+        "baseline_start": baseline_start, "baseline_end": str(dates[-1])
+    }
+
+
+def _load_states(tickers):
+    return get_repository().load_volume_states(tickers)
+
+# =========================================================
+# 📊 Z-score 조회
+# =========================================================
+def z_score(ticker, volume):
+    """저장된 기준선으로 Z-score 계산 (기준선이 없거나 부족하면 0.0)"""
+    state = _load_states([ticker]).get(ticker)
+    if state is None or state["n"] < MIN_SAMPLES:
+        return 0.0
+    std = math.sqrt(state["m2"] / (state["n"] - 1))
+    if std == 0:
+        return 0.0
+    return round((volume - state["mean"]) / std, 2)
+
+
+def batch_z_scores(tickers, volumes):
+    """
+    여러 종목의 Z-score를 한 번에 계산 (Finviz 결과 페이지 단위)
+    반환: tickers 순서와 같은 float 배열
+    """
+    tickers = list(tickers)
+    states = _load_states(list(dict.fromkeys(tickers)))
+
+    n = np.array([states[t]["n"] if t in states else 0 for t in tickers], dtype=float)
+    mean = np.array([states[t]["mean"] if t in states else 0.0 for t in tickers], dtype=float)
+    m2 = np.array([states[t]["m2"] if t in states else 0.0 for t in tickers], dtype=float)
+    volumes = np.asarray(volumes, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(m2 / (n - 1))
+        z = (volumes - mean) / std
+    z = np.where((n >= MIN_SAMPLES) & (std > 0) & np.isfinite(z), z, 0.0)
+    return np.round(z, 2)
@@ -0,0 +1,272 @@
+# backend/services/whale_repository.py
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# =========================================================
+# ⚙️ [설정]
+# =========================================================
+DB_PATH = "whale_tracker.db"
+ROLLUP_WINDOWS = (7, 30, 90)   # 롤업 테이블에 유지하는 기간별 출몰 횟수
+
+# ---------------------------------------------------------
+# 스키마 마이그레이션 (PRAGMA user_version 으로 버전 관리)
+# ---------------------------------------------------------
+MIGRATIONS = [
+    # v1: 기본 테이블 (init_whale_db.py와 동일)
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS daily_whale (
+            ticker TEXT,
+            date TEXT,
+            price REAL,
+            volume INTEGER,
+            z_score REAL,
+            rel_volume REAL,
+            is_whale_day BOOLEAN,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (ticker, date)
+        )
+        ''',
+    ],
+    # v2: 커버링 인덱스 + 빈도 롤업 테이블
+    [
+        # 종목별 기간 집계(횟수/Z-score)를 테이블 접근 없이 인덱스만으로 처리
+        "CREATE INDEX IF NOT EXISTS idx_daily_whale_ticker_date_z ON daily_whale (ticker, date, z_score)",
+        # 날짜 범위 리더보드 (최근 N일 전체 종목)
+        "CREATE INDEX IF NOT EXISTS idx_daily_whale_date_ticker_z ON daily_whale (date, ticker, z_score)",
+        '''
+        CREATE TABLE IF NOT EXISTS whale_rollup (
+            ticker TEXT PRIMARY KEY,
+            as_of TEXT,
+            cnt_7 INTEGER,
+            cnt_30 INTEGER,
+            cnt_90 INTEGER,
+            total_count INTEGER,
+            avg_z_30 REAL,
+            max_z_30 REAL,
+            max_z_all REAL,
+            last_date TEXT
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_whale_rollup_cnt_30 ON whale_rollup (cnt_30 DESC, max_z_30 DESC)",
+    ],
+    # v3: 종목별 거래량 기준선 상태 (volume_stats)
+    [
+        # baseline_start / baseline_end: 기준선에 포함된 가장 오래된/최근 봉 날짜
+        '''
+        CREATE TABLE IF NOT EXISTS volume_stats (
+            ticker TEXT PRIMARY KEY,
+            window INTEGER,
+            n INTEGER,
+            mean REAL,
+            m2 REAL,
+            baseline_start TEXT,
+            baseline_end TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ],
+]
+
+
+def migrate(conn):
+    """아직 적용되지 않은 마이그레이션만 순서대로 적용, 적용 후 버전 반환"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        with conn:
+            for sql in statements:
+                conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {target}")
+        print(f"   🗄️ [DB] 스키마 v{target} 적용")
+        if target == 2:
+            # 기존 기록으로 롤업 초기 생성
+            _refresh_rollup(conn, None, datetime.now())
+    return len(MIGRATIONS)
+
+
+def _refresh_rollup(conn, tickers, now):
+    """
+    whale_rollup 재계산 (tickers=None이면 전체 종목)
+    커버링 인덱스 (ticker, date, z_score) 로 종목별 범위 스캔만 수행
+    """
+    as_of = now.strftime('%Y-%m-%d')
+    d7, d30, d90 = [(now - timedelta(days=d)).strftime('%Y-%m-%d') for d in ROLLUP_WINDOWS]
+    where, params = "", []
+    if tickers is not None:
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return
+        where = f"WHERE ticker IN ({','.join('?' * len(tickers))})"
+        params = tickers
+
+    with conn:
+        conn.execute(f'''
+            INSERT OR REPLACE INTO whale_rollup
+            (ticker, as_of, cnt_7, cnt_30, cnt_90, total_count, avg_z_30, max_z_30, max_z_all, last_date)
+            SELECT ticker, ?,
+                   SUM(date >= ?), SUM(date >= ?), SUM(date >= ?), COUNT(*),
+                   AVG(CASE WHEN date >= ? THEN z_score END),
+                   MAX(CASE WHEN date >= ? THEN z_score END),
+                   MAX(z_score), MAX(date)
+            FROM daily_whale {where}
+            GROUP BY ticker
+        ''', [as_of, d7, d30, d90, d30, d30, *params])
+
+
+class WhaleRepository:
+    """
+    whale_tracker.db 접근 객체
+    - 연결 하나를 계속 재사용 (WAL + synchronous=NORMAL)
+    - 스캔 중 포착된 이벤트는 모아뒀다가 한 트랜잭션으로 일괄 저장
+    - 빈도 조회는 저장 시 갱신되는 whale_rollup 테이블에서 한 번에 읽음
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 모드에서는 NORMAL로도 충돌 시 DB가 깨지지 않음 (마지막 트랜잭션만 유실 가능)
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        migrate(self.conn)
+        self.lock = threading.Lock()
+        self.pending = []
+
+    # -----------------------------------------------------
+    # 저장
+    # -----------------------------------------------------
+    def add_event(self, data):
+        """저장 대기열에 추가 (flush 전까지 DB에 쓰지 않음)"""
+        with self.lock:
+            self.pending.append((
+                data['ticker'], data['date'], data['price'],
+                data['volume'], data['z_score'], data['rel_volume'], 1
+            ))
+
+    def flush(self):
+        """대기열을 한 트랜잭션으로 일괄 저장, 저장한 행 수 반환"""
+        with self.lock:
+            rows, self.pending = self.pending, []
+            if not rows:
+                return 0
+            try:
+                with self.conn:
+                    self.conn.executemany('''
+                        INSERT OR IGNORE INTO daily_whale
+                        (ticker, date, price, volume, z_score, rel_volume, is_whale_day)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', rows)
+                # 저장된 종목의 롤업 갱신
+                _refresh_rollup(self.conn, [r[0] for r in rows], datetime.now())
+            except Exception as e:
+                print(f"   ⚠️ DB 저장 에러: {e}")
+                return 0
+        return len(rows)
+
+    def save_events(self, events):
+        for data in events:
+            self.add_event(data)
+        return self.flush()
+
+    # -----------------------------------------------------
+    # 조회
+    # -----------------------------------------------------
+    def ensure_rollup_current(self, now=None):
+        """날짜가 바뀌어 기간 창이 밀린 롤업 행만 다시 계산"""
+        now = now or datetime.now()
+        as_of = now.strftime('%Y-%m-%d')
+        with self.lock:
+            stale = [r[0] for r in self.conn.execute(
+                "SELECT ticker FROM whale_rollup WHERE as_of < ?", (as_of,)
+            ).fetchall()]
+            if stale:
+                _refresh_rollup(self.conn, stale, now)
+
+    def get_frequencies(self, tickers, now=None):
+        """
+        종목별 주간(7일)/월간(30일) 출몰 횟수를 롤업 테이블에서 한 번에 조회
+        반환: {ticker: (weekly, monthly)} (기록 없는 종목은 (0, 0))
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+        self.ensure_rollup_current(now)
+
+        placeholders = ",".join("?" * len(tickers))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT ticker, cnt_7, cnt_30 FROM whale_rollup WHERE ticker IN ({placeholders})", tickers
+            ).fetchall()
+
+        result = {t: (0, 0) for t in tickers}
+        result.update({r[0]: (int(r[1] or 0), int(r[2] or 0)) for r in rows})
+        return result
+
+    def get_leaderboard(self, days=30, limit=10):
+        """최근 N일(7/30/90) 출몰 횟수 상위 종목"""
+        if days not in ROLLUP_WINDOWS:
+            raise ValueError(f"days must be one of {ROLLUP_WINDOWS}")
+        self.ensure_rollup_current()
+        with self.lock:
+            rows = self.conn.execute(f'''
+                SELECT ticker, cnt_{days}, avg_z_30, max_z_30, last_date
+                FROM whale_rollup
+                WHERE cnt_{days} > 0
+                ORDER BY cnt_{days} DESC, max_z_30 DESC
+                LIMIT ?
+            ''', (limit,)).fetchall()
+        return [
+            {"ticker": r[0], "count": r[1], "avg_z_30": r[2], "max_z_30": r[3], "last_date": r[4]}
+            for r in rows
+        ]
+
+    # -----------------------------------------------------
+    # 거래량 기준선 상태 (volume_stats)
+    # -----------------------------------------------------
+    def load_volume_states(self, tickers):
+        """반환: {ticker: {"ticker", "window", "n", "mean", "m2", "baseline_start", "baseline_end"}}"""
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+        placeholders = ",".join("?" * len(tickers))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT ticker, window, n, mean, m2, baseline_start, baseline_end FROM volume_stats WHERE ticker IN ({placeholders})",
+                tickers
+            ).fetchall()
+        return {
+            r[0]: {"ticker": r[0], "window": r[1], "n": r[2], "mean": r[3], "m2": r[4],
+                   "baseline_start": r[5], "baseline_end": r[6]}
+            for r in rows
+        }
+
+    def save_volume_states(self, states):
+        """기준선 상태들을 한 트랜잭션으로 저장"""
+        if not states:
+            return
+        with self.lock:
+            with self.conn:
+                self.conn.executemany('''
+                    INSERT OR REPLACE INTO volume_stats
+                    (ticker, window, n, mean, m2, baseline_start, baseline_end, updated_at)
+                    VALUES (:ticker, :window, :n, :mean, :m2, :baseline_start, :baseline_end, CURRENT_TIMESTAMP)
+                ''', states)
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.conn.close()
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def get_repository():
+    """프로세스 공용 저장소 (연결 1개 재사용)"""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            _repository = WhaleRepository()
+        return _repository
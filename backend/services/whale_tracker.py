@@ -1,16 +1,14 @@
-import sqlite3
-import requests
 import pandas as pd
-import yfinance as yf
 from datetime import datetime, timedelta
-import time
 import os
+from io import StringIO
+
+from services import crawl_scheduler, volume_stats
+from services.whale_repository import DB_PATH, get_repository
 
 # =========================================================
 # ⚙️ [설정]
 # =========================================================
-DB_PATH = "whale_tracker.db"
-
 # 미국 주식시장 휴장일 (2025~2026년 주요 공휴일)
 NYSE_HOLIDAYS = [
     "2025-01-01", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26", 
@@ -49,63 +47,83 @@ def get_target_report_date():
 # =========================================================
 # 🗄️ DB 핸들링
 # =========================================================
+# 연결 재사용 + 일괄 저장은 WhaleRepository가 담당 (아래는 단건 호환용)
 def get_frequency(ticker):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    date_7 = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-    date_30 = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    
-    cursor.execute("SELECT COUNT(*) FROM daily_whale WHERE ticker = ? AND date >= ?", (ticker, date_7))
-    weekly = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM daily_whale WHERE ticker = ? AND date >= ?", (ticker, date_30))
-    monthly = cursor.fetchone()[0]
-    
-    conn.close()
-    return weekly, monthly
+    return get_repository().get_frequencies([ticker])[ticker]
 
 def save_whale_event(data):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
-            INSERT OR IGNORE INTO daily_whale 
-            (ticker, date, price, volume, z_score, rel_volume, is_whale_day)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data['ticker'], data['date'], data['price'], 
-            data['volume'], data['z_score'], data['rel_volume'], 1
-        ))
-        conn.commit()
-    except Exception as e:
-        print(f"   ⚠️ DB 저장 에러: {e}")
-    finally:
-        conn.close()
+    get_repository().save_events([data])
 
 # =========================================================
 # 📊 Z-score 계산
 # =========================================================
 def calculate_z_score(ticker, today_vol):
     try:
-        stock = yf.Ticker(ticker)
-        # 통계적 신뢰도를 위해 1년치 데이터 사용
-        hist = stock.history(period="1y")
-        if len(hist) < 20: return 0.0
-        
-        # 오늘(최근) 데이터를 제외한 과거 데이터로 기준선 산출
-        past_data = hist[:-1]
-        mean_vol = past_data['Volume'].mean()
-        std_vol = past_data['Volume'].std()
-        
-        if std_vol == 0: return 0.0
-        return round((today_vol - mean_vol) / std_vol, 2)
+        # 기준선(평균/표준편차)은 volume_stats 인덱스에 증분 유지 → 조회만 하면 됨
+        volume_stats.refresh([ticker])
+        return volume_stats.z_score(ticker, today_vol)
     except:
         return 0.0
 
+def calculate_z_scores(tickers, volumes):
+    """한 페이지의 후보 종목들을 한 번에 Z-score 계산 (일봉 동기화도 묶어서 1회)"""
+    try:
+        volume_stats.refresh(tickers)
+        return volume_stats.batch_z_scores(tickers, volumes).tolist()
+    except Exception as e:
+        print(f"   ⚠️ Z-score 계산 에러: {e}")
+        return [0.0] * len(tickers)
+
 # =========================================================
 # 🚀 메인 로직 (멀티 타겟 스캔)
 # =========================================================
+# 감시 대상 그룹 정의 (이름, Finviz 필터코드)
+# idx_sp500: S&P 500
+# idx_ndx: Nasdaq 100
+# exch_nyse: NYSE (거래소 전체)
+TARGETS = [
+    ("S&P 500", "idx_sp500"),
+    ("Nasdaq 100", "idx_ndx"),
+    ("NYSE", "exch_nyse")
+]
+PAGE_STARTS = range(1, 61, 20)   # 각 그룹당 3페이지(60개) 스캔: 1, 21, 41
+CRAWL_WORKERS = 4                # 동시 다운로드 수 (실제 요청 속도는 crawl_scheduler 토큰 버킷이 제한)
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+def parse_volume(vol_str):
+    if 'M' in vol_str: return int(float(vol_str.replace('M','')) * 1_000_000)
+    elif 'B' in vol_str: return int(float(vol_str.replace('B','')) * 1_000_000_000)
+    elif 'K' in vol_str: return int(float(vol_str.replace('K','')) * 1_000)
+    return int(vol_str)
+
+def fetch_screener_page(job):
+    target_name, filter_code, start_row = job
+    # 필터 조합: 해당지수 + 상대거래량 > 1.5 + 거래량 내림차순
+    url = f"https://finviz.com/screener.ashx?v=111&f={filter_code},sh_relvol_o1.5&ft=4&o=-volume&r={start_row}"
+    res = crawl_scheduler.throttled_get(url, headers=HEADERS, timeout=10)
+    return res.text
+
+def parse_screener_page(job, html):
+    """스크리너 표 → [(ticker, price, volume, rel_vol), ...]"""
+    try:
+        dfs = pd.read_html(StringIO(html), header=0, attrs={'class': 'table-light'})
+    except ValueError:
+        return [] # 결과 표가 없는 페이지
+    if not dfs:
+        return []
+
+    rows = []
+    for index, row in dfs[0].iterrows():
+        try:
+            ticker = str(row['Ticker'])
+            price = float(str(row['Price']))
+            rel_vol = float(str(row['Rel Volume']))
+            volume = parse_volume(str(row['Volume']))
+        except: continue
+        rows.append((ticker, price, volume, rel_vol))
+    return rows
+
 def run_whale_tracker():
     print("🐋 [Whale Tracker] S&P500 / Nasdaq100 / NYSE 정밀 감시 시작...")
     
@@ -116,94 +134,67 @@ def run_whale_tracker():
     report_date = get_target_report_date()
     print(f"   📅 분석 기준일 확정: {report_date}")
 
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
     results = []
+    detected = []   # 스캔 중 포착 목록 (DB 저장은 스캔 끝난 뒤 한 번에)
     
     # 중복 리포팅 방지용 (이미 처리한 종목은 건너뜀)
     seen_tickers = set()
 
-    # 감시 대상 그룹 정의 (이름, Finviz 필터코드)
-    # idx_sp500: S&P 500
-    # idx_ndx: Nasdaq 100
-    # exch_nyse: NYSE (거래소 전체)
-    TARGETS = [
-        ("S&P 500", "idx_sp500"),
-        ("Nasdaq 100", "idx_ndx"),
-        ("NYSE", "exch_nyse")
-    ]
-
-    for target_name, filter_code in TARGETS:
-        print(f"\n   🔍 [{target_name}] 그룹 스캔 중... (Top 60)")
-        
-        # 각 그룹당 3페이지(60개) 스캔: 1, 21, 41
-        for start_row in range(1, 61, 20):
-            # 필터 조합: 해당지수 + 상대거래량 > 1.5 + 거래량 내림차순
-            url = f"https://finviz.com/screener.ashx?v=111&f={filter_code},sh_relvol_o1.5&ft=4&o=-volume&r={start_row}"
-            
-            try:
-                # print(f"      📡 Page {(start_row//20)+1} 요청 중...")
-                res = requests.get(url, headers=headers, timeout=10)
-                dfs = pd.read_html(res.text, header=0, attrs={'class': 'table-light'})
-                
-                if not dfs: break
-                df = dfs[0]
-                
-                for index, row in df.iterrows():
-                    try:
-                        ticker = str(row['Ticker'])
-                        
-                        # 이미 분석한 종목이면 스킵 (중복 방지)
-                        if ticker in seen_tickers:
-                            continue
-                        
-                        seen_tickers.add(ticker) # 처리 목록에 추가
-
-                        # 데이터 파싱
-                        price = float(str(row['Price']))
-                        rel_vol = float(str(row['Rel Volume']))
-                        vol_str = str(row['Volume'])
-                        if 'M' in vol_str: volume = int(float(vol_str.replace('M','')) * 1_000_000)
-                        elif 'B' in vol_str: volume = int(float(vol_str.replace('B','')) * 1_000_000_000)
-                        elif 'K' in vol_str: volume = int(float(vol_str.replace('K','')) * 1_000)
-                        else: volume = int(vol_str)
-                    except: continue
-
-                    # ------------------------------------------
-                    # 2차 검증: Z-score > 2.0
-                    # ------------------------------------------
-                    z_score = calculate_z_score(ticker, volume)
-                    
-                    if z_score >= 2.0:
-                        # DB 저장
-                        data = {
-                            'ticker': ticker, 'date': report_date, 'price': price,
-                            'volume': volume, 'z_score': z_score, 'rel_volume': rel_vol
-                        }
-                        save_whale_event(data)
-                        
-                        # 빈도 조회
-                        weekly, monthly = get_frequency(ticker)
-                        
-                        # 그룹명 태그 추가 (어디서 발견됐는지)
-                        results.append({
-                            "ticker": ticker,
-                            "group": target_name, # S&P 500 등
-                            "date": report_date,
-                            "price": f"${price}",
-                            "volume": f"{volume:,}",
-                            "z_score": z_score,
-                            "rel_volume": rel_vol,
-                            "weekly_freq": weekly,
-                            "monthly_freq": monthly,
-                            "msg": f"🔥 {ticker} ({target_name}): Z-score {z_score}"
-                        })
-                        print(f"      🚨 [포착] {ticker} (Z:{z_score}, 월간:{monthly}회)")
-                
-                time.sleep(1) # 페이지 넘길 때 딜레이
-
-            except Exception as e:
-                print(f"   ⚠️ 크롤링 에러 ({target_name}): {e}")
-                break
+    def verify_page(job, rows):
+        target_name = job[0]
+        # 이미 분석한 종목이면 스킵 (중복 방지)
+        candidates = []
+        for row in rows:
+            if row[0] in seen_tickers:
+                continue
+            seen_tickers.add(row[0])
+            candidates.append(row)
+        if not candidates:
+            return
+
+        # ------------------------------------------
+        # 2차 검증: Z-score > 2.0 (페이지 단위 일괄 계산)
+        # ------------------------------------------
+        z_scores = calculate_z_scores([c[0] for c in candidates], [c[2] for c in candidates])
+
+        for (ticker, price, volume, rel_vol), z_score in zip(candidates, z_scores):
+            if z_score >= 2.0:
+                detected.append({
+                    'ticker': ticker, 'group': target_name, 'date': report_date, 'price': price,
+                    'volume': volume, 'z_score': z_score, 'rel_volume': rel_vol
+                })
+
+    # 페이지 다운로드는 동시에(호스트 속도 제한 내), 검증은 페이지 순서대로 다운로드와 겹쳐서 진행
+    jobs = [(target_name, filter_code, start_row)
+            for target_name, filter_code in TARGETS
+            for start_row in PAGE_STARTS]
+    print(f"   🔍 {len(TARGETS)}개 그룹 x {len(PAGE_STARTS)}페이지 스캔 중...")
+    crawl_scheduler.run_pipeline(jobs, fetch_screener_page, parse_screener_page, verify_page,
+                                 max_workers=CRAWL_WORKERS, title="Whale Scan")
+    
+    # DB 저장 (한 트랜잭션) + 빈도 조회 (GROUP BY 한 번)
+    repo = get_repository()
+    repo.save_events(detected)
+    frequencies = repo.get_frequencies([d['ticker'] for d in detected])
+
+    for data in detected:
+        ticker, target_name, z_score = data['ticker'], data['group'], data['z_score']
+        weekly, monthly = frequencies[ticker]
+
+        # 그룹명 태그 추가 (어디서 발견됐는지)
+        results.append({
+            "ticker": ticker,
+            "group": target_name, # S&P 500 등
+            "date": report_date,
+            "price": f"${data['price']}",
+            "volume": f"{data['volume']:,}",
+            "z_score": z_score,
+            "rel_volume": data['rel_volume'],
+            "weekly_freq": weekly,
+            "monthly_freq": monthly,
+            "msg": f"🔥 {ticker} ({target_name}): Z-score {z_score}"
+        })
+        print(f"      🚨 [포착] {ticker} (Z:{z_score}, 월간:{monthly}회)")
     
     print(f"\n✅ 스캔 완료. 총 {len(results)}건의 고래 거래 포착.")
-    return results
\ No newline at end of file
+    return results